@@ -1,29 +1,95 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
 
 # Register your models here.
-from .models import Product, ProductImage, Material, ContactUs, Inquiry, InquiryItems
+from .models import (
+    Product, ProductImage, Material, ContactUs, Inquiry, InquiryLine, Category, MainCategory, SampleType,
+    ArchivedContactUs, ArchivedInquiry,
+)
+from .paginators import EstimatedCountPaginator
 
-class InquiryItemsInline(admin.TabularInline):
-    model = Inquiry.items.through
+class EstimatedCountAdminMixin:
+    """
+    Changelists of large tables: no exact COUNT(*), see EstimatedCountPaginator
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        # The count only has to reach past the page being shown
+        try:
+            page = int(request.GET.get(PAGE_VAR, 1))
+        except ValueError:
+            page = 1
+        return self.paginator(queryset, per_page, orphans, allow_empty_first_page, page=page)
+
+class InquiryLineInline(admin.TabularInline):
+    model = InquiryLine
     extra = 1
+    raw_id_fields = ['product']  # avoid rendering every product in a select per row
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('product')
 
 @admin.register(Inquiry)
-class InquiryAdmin(admin.ModelAdmin):
+class InquiryAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ['name', 'email', 'subject', 'created_at', 'is_read']
     list_filter = ['is_read', 'created_at']
     search_fields = ['name', 'email', 'subject']
     readonly_fields = ['created_at', 'updated_at']
-    inlines = [InquiryItemsInline]
-    exclude = ('items',)  # Hide the items field since we're using inline
+    inlines = [InquiryLineInline]
+    # Large inbox: ordered by the created_at indexes, no exact COUNT(*)
+    ordering = ['-created_at', '-id']
 
-@admin.register(InquiryItems)
-class InquiryItemsAdmin(admin.ModelAdmin):
-    list_display = ['id', 'product']
+@admin.register(InquiryLine)
+class InquiryLineAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+    list_display = ['id', 'inquiry', 'product', 'quantity']
+    list_select_related = ['inquiry', 'product']
     search_fields = ['product__name']
+    raw_id_fields = ['inquiry', 'product']
+
+@admin.register(ContactUs)
+class ContactUsAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+    list_display = ['name', 'email', 'subject', 'created_at', 'is_read']
+    list_filter = ['is_read', 'created_at']
+    search_fields = ['name', 'email', 'subject']
+    readonly_fields = ['created_at', 'updated_at']
+    # Large inbox: ordered by the created_at indexes, no exact COUNT(*)
+    ordering = ['-created_at', '-id']
+
+class ArchivedSubmissionAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+    """
+    Read-only view of submissions moved out by archive_submissions
+    """
+    list_display = ['name', 'email', 'subject', 'created_at', 'archived_at']
+    list_filter = ['created_at']
+    search_fields = ['name', 'email', 'subject']
+    ordering = ['-created_at', '-id']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ArchivedContactUs)
+class ArchivedContactUsAdmin(ArchivedSubmissionAdmin):
+    pass
+
+@admin.register(ArchivedInquiry)
+class ArchivedInquiryAdmin(ArchivedSubmissionAdmin):
+    # lines is a JSON list of {product, name, quantity}
+    search_fields = ArchivedSubmissionAdmin.search_fields + ['lines']
+
+@admin.register(Product)
+class ProductAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
+    # Newest first on product_date_idx, like the product list
+    ordering = ['-date', '-id']
 
-admin.site.register(Product)
 admin.site.register(ProductImage)
 admin.site.register(Material)
-admin.site.register(ContactUs)
+admin.site.register(Category)
+admin.site.register(MainCategory)
+admin.site.register(SampleType)
 
 
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Warning, register
+
+
+@register()
+def shared_cache_check(app_configs, **kwargs):
+    """
+    Submission rate limits and stored Idempotency-Key responses live in the
+    default cache; a process-local cache gives every worker its own copy
+    """
+    if settings.DEBUG or not isinstance(caches['default'], LocMemCache):
+        return []
+    return [
+        Warning(
+            'The default cache is process-local, so submission rate limits are multiplied by the number '
+            'of worker processes and Idempotency-Key responses are not shared between them.',
+            hint='Set REDIS_URL to use a shared cache.',
+            id='api.W001',
+        )
+    ]
@@ -0,0 +1,74 @@
+from datetime import timedelta
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api.models import ContactUs, Inquiry, InquiryLine, ArchivedContactUs, ArchivedInquiry
+from api.transactions import write_transaction
+
+ARCHIVED_FIELDS = ('id', 'name', 'email', 'subject', 'message', 'created_at', 'updated_at')
+
+
+class Command(BaseCommand):
+    help = 'Moves read contact messages and inquiries older than the retention window into the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.SUBMISSION_ARCHIVE_AFTER_DAYS,
+            help='Archive read submissions created more than this many days ago'
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='Submissions moved per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the submissions that would move')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        started = time.perf_counter()
+
+        for model, archive in ((ContactUs, ArchivedContactUs), (Inquiry, ArchivedInquiry)):
+            candidates = model.objects.filter(is_read=True, created_at__lt=cutoff)
+            if options['dry_run']:
+                self.stdout.write(f'{candidates.count()} {model._meta.verbose_name_plural} would be archived')
+                continue
+
+            moved = 0
+            while True:
+                count = self.move_batch(candidates, archive, options['batch_size'])
+                if not count:
+                    break
+                moved += count
+            self.stdout.write(f'Archived {moved} {model._meta.verbose_name_plural}')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'Finished in {elapsed:.2f}s'))
+
+    @staticmethod
+    @write_transaction()
+    def move_batch(candidates, archive, batch_size):
+        """
+        Copy one batch into the archive and delete it from the hot table in a
+        single transaction, so a submission is always in exactly one of them.
+        It reads before writing, so it takes the write lock up front.
+        """
+        rows = list(candidates.order_by('created_at', 'id').values(*ARCHIVED_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        ids = [row['id'] for row in rows]
+
+        if archive is ArchivedInquiry:
+            lines = {}
+            for inquiry_id, product_id, name, quantity in InquiryLine.objects.filter(
+                inquiry_id__in=ids
+            ).values_list('inquiry_id', 'product_id', 'product__name', 'quantity'):
+                lines.setdefault(inquiry_id, []).append(
+                    {'product': str(product_id), 'name': name, 'quantity': quantity}
+                )
+            for row in rows:
+                row['lines'] = lines.get(row['id'], [])
+
+        archive.objects.bulk_create(archive(**row) for row in rows)
+        # Inquiry lines go with their inquiry (on_delete=CASCADE)
+        candidates.model.objects.filter(id__in=ids).delete()
+        return len(rows)
@@ -0,0 +1,135 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from api.models import (
+    Product, Inquiry, InquiryLine, ArchivedInquiry, DailyInquiryRollup, ProductInquiryRollup, CategoryInquiryRollup,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuilds the inquiry analytics rollups from the full inquiry history, '
+        'including inquiries moved to the archive by archive_submissions'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            archived_days, archived_products, archived_categories = self.archived_rollups(batch_size)
+
+            DailyInquiryRollup.objects.all().delete()
+            ProductInquiryRollup.objects.all().delete()
+            CategoryInquiryRollup.objects.all().delete()
+
+            days = {
+                row['day']: DailyInquiryRollup(day=row['day'], inquiries=row['inquiries'])
+                for row in Inquiry.objects.annotate(day=TruncDate('created_at'))
+                .values('day').annotate(inquiries=Count('id')).order_by()
+            }
+            lines = InquiryLine.objects.annotate(day=TruncDate('inquiry__created_at'))
+            for row in lines.values('day').annotate(lines=Count('id'), quantity=Sum('quantity')).order_by():
+                days[row['day']].lines = row['lines']
+                days[row['day']].quantity = row['quantity']
+            for day, (inquiries, line_count, quantity) in archived_days.items():
+                rollup = days.setdefault(day, DailyInquiryRollup(day=day))
+                rollup.inquiries += inquiries
+                rollup.lines += line_count
+                rollup.quantity += quantity
+            DailyInquiryRollup.objects.bulk_create(days.values(), batch_size=batch_size)
+
+            products = lines.values('product_id', 'day').annotate(
+                inquiries=Count('id'), quantity=Sum('quantity')
+            ).order_by()
+            product_count = self.bulk_insert(
+                ProductInquiryRollup,
+                self.merged(products.iterator(), archived_products, ('product_id', 'day')),
+                batch_size
+            )
+
+            categories = lines.values('day', category=F('product__category__name')).annotate(
+                inquiries=Count('inquiry_id', distinct=True), quantity=Sum('quantity')
+            ).order_by()
+            category_count = self.bulk_insert(
+                CategoryInquiryRollup,
+                self.merged(categories.iterator(), archived_categories, ('category', 'day')),
+                batch_size
+            )
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {len(days)} daily, {product_count} product and {category_count} category rollups '
+            f'in {elapsed:.2f}s'
+        ))
+
+    @staticmethod
+    def archived_rollups(batch_size):
+        """
+        Rollup counts of the inquiries in ArchivedInquiry, from their created_at
+        and lines JSON, keyed like the rollup tables:
+        ({day: (inquiries, lines, quantity)}, {(product_id, day): (inquiries, quantity)},
+        {(category, day): (inquiries, quantity)}).
+        Lines of products deleted since only count towards the daily totals.
+        """
+        product_categories = dict(Product.objects.values_list('id', 'category__name'))
+        days, products, categories = {}, {}, {}
+        for created_at, lines in ArchivedInquiry.objects.values_list('created_at', 'lines').iterator(
+            chunk_size=batch_size
+        ):
+            day = timezone.localdate(created_at)
+            inquiries, line_count, quantity = days.get(day, (0, 0, 0))
+            days[day] = (inquiries + 1, line_count + len(lines), quantity + sum(line['quantity'] for line in lines))
+
+            inquiry_categories = {}
+            for line in lines:
+                product_id = uuid.UUID(line['product'])
+                if product_id not in product_categories:
+                    continue
+                inquiries, quantity = products.get((product_id, day), (0, 0))
+                products[(product_id, day)] = (inquiries + 1, quantity + line['quantity'])
+                category = product_categories[product_id]
+                inquiry_categories[category] = inquiry_categories.get(category, 0) + line['quantity']
+            for category, line_quantity in inquiry_categories.items():
+                inquiries, quantity = categories.get((category, day), (0, 0))
+                categories[(category, day)] = (inquiries + 1, quantity + line_quantity)
+        return days, products, categories
+
+    @staticmethod
+    def merged(rows, archived, key_fields):
+        """
+        Add the archived (inquiries, quantity) counts to aggregate rows with the
+        same key, then yield the archived keys no live inquiry has
+        """
+        for row in rows:
+            counts = archived.pop(tuple(row[field] for field in key_fields), None)
+            if counts is not None:
+                row['inquiries'] += counts[0]
+                row['quantity'] += counts[1]
+            yield row
+        for key, (inquiries, quantity) in archived.items():
+            yield {**dict(zip(key_fields, key)), 'inquiries': inquiries, 'quantity': quantity}
+
+    @staticmethod
+    def bulk_insert(model, rows, batch_size):
+        """
+        Insert rollup rows from an aggregate iterator without holding them all in memory
+        """
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(model(**row))
+            if len(batch) >= batch_size:
+                model.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        model.objects.bulk_create(batch)
+        return total + len(batch)
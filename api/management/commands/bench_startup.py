@@ -0,0 +1,108 @@
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.urls import resolve
+
+BOOT_SCRIPT = (
+    'import os, time\n'
+    'started = time.perf_counter()\n'
+    "os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')\n"
+    'from django.core.wsgi import get_wsgi_application\n'
+    'get_wsgi_application()\n'
+    'print(time.perf_counter() - started)\n'
+)
+
+
+class Command(BaseCommand):
+    help = 'Measures worker boot time and per-request middleware overhead for the current settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5, help='Number of cold worker boots to time')
+        parser.add_argument('--requests', type=int, default=500, help='Requests used to time middleware')
+        parser.add_argument('--path', default='/api/products/', help='GET path used to time middleware')
+        parser.add_argument('--imports', type=int, default=10, help='Show the N slowest imports (0 to skip)')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Profile: DEBUG={settings.DEBUG}, {len(settings.INSTALLED_APPS)} apps, '
+                          f'{len(settings.MIDDLEWARE)} middleware')
+        self.bench_boot(options['runs'])
+        if options['imports']:
+            self.slowest_imports(options['imports'])
+        self.bench_middleware(options['path'], options['requests'])
+
+    def run_boot(self, *flags):
+        return subprocess.run(
+            [sys.executable, *flags, '-c', BOOT_SCRIPT],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        )
+
+    def bench_boot(self, runs):
+        """
+        Time fresh interpreters importing settings, apps and the WSGI application
+        """
+        timings = [float(self.run_boot().stdout.strip().splitlines()[-1]) for _ in range(runs)]
+        self.stdout.write(
+            f'Worker boot: min {min(timings) * 1000:.1f} ms, median {statistics.median(timings) * 1000:.1f} ms, '
+            f'max {max(timings) * 1000:.1f} ms over {runs} runs'
+        )
+
+    def slowest_imports(self, limit):
+        """
+        Top-level packages ranked by cumulative import time (python -X importtime)
+        """
+        totals = {}
+        for line in self.run_boot('-X', 'importtime').stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if not cumulative.strip().isdigit():
+                continue
+            # Nested imports are indented and already counted by their parent
+            if name.startswith('  '):
+                continue
+            package = name.strip().split('.')[0]
+            totals[package] = totals.get(package, 0) + int(cumulative)
+        self.stdout.write('Slowest imports:')
+        for name, micros in sorted(totals.items(), key=lambda item: -item[1])[:limit]:
+            self.stdout.write(f'  {micros / 1000:8.1f} ms  {name}')
+
+    def bench_middleware(self, path, requests):
+        """
+        Compare a request through the full handler with calling the view directly
+        """
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h and h != '*'), 'localhost')
+        factory = RequestFactory(SERVER_NAME=host)
+        handler = WSGIHandler()
+        view = resolve(path)
+
+        def through_middleware():
+            handler.get_response(factory.get(path))
+
+        def view_only():
+            response = view.func(factory.get(path), *view.args, **view.kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+
+        # Warm caches and connections before timing
+        through_middleware()
+        view_only()
+
+        full = self.time_calls(through_middleware, requests)
+        bare = self.time_calls(view_only, requests)
+        self.stdout.write(
+            f'GET {path}: {full * 1e6:.0f} us with middleware, {bare * 1e6:.0f} us view only, '
+            f'middleware overhead {(full - bare) * 1e6:.0f} us/request'
+        )
+
+    @staticmethod
+    def time_calls(func, count):
+        started = time.perf_counter()
+        for _ in range(count):
+            func()
+        return (time.perf_counter() - started) / count
@@ -0,0 +1,168 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+from api.models import Product, RelatedProduct
+
+# Relative weight of each feature group in the similarity score
+CATEGORY_WEIGHT = 1.0
+MAIN_CATEGORY_WEIGHT = 0.5
+MATERIALS_WEIGHT = 1.0
+PRICE_WEIGHT = 0.5
+
+
+class Command(BaseCommand):
+    help = 'Builds the precomputed top-K related products table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top-k', type=int, default=settings.RELATED_PRODUCTS_TOP_K)
+        parser.add_argument('--block-size', type=int, default=256,
+                            help='Rows of the similarity matrix computed at once')
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every product instead of only changed ones')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        computed_at = timezone.now()
+        top_k = options['top_k']
+        block_size = options['block_size']
+
+        ids, features, log_prices, updated_at = self.load_catalog()
+        if len(ids) < 2:
+            self.stdout.write('Not enough products to relate')
+            return
+        k = min(top_k, len(ids) - 1)
+
+        if options['full']:
+            targets = np.arange(len(ids))
+        else:
+            targets = self.affected_rows(ids, features, log_prices, updated_at, k, block_size)
+
+        written = 0
+        for start in range(0, len(targets), block_size):
+            rows = targets[start:start + block_size]
+            neighbours, scores = self.top_neighbours(rows, features, log_prices, k)
+            written += self.save_block(ids, rows, neighbours, scores, computed_at)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed {len(targets)} of {len(ids)} products ({written} rows) in {elapsed:.2f}s'
+        ))
+
+    @staticmethod
+    def load_catalog():
+        """
+        Return product ids, the L2-normalised feature matrix, log prices and updated_at
+        """
+        rows = list(Product.objects.order_by('pk').values_list(
+            'id', 'category', 'main_category', 'price', 'updated_at'
+        ))
+        ids = [row[0] for row in rows]
+        index = {pk: i for i, pk in enumerate(ids)}
+
+        categories = {value: i for i, value in enumerate(sorted({row[1] for row in rows}))}
+        main_categories = {value: i for i, value in enumerate(sorted({row[2] for row in rows}))}
+        material_pairs = list(Product.materials.through.objects.values_list('product_id', 'material_id'))
+        materials = {value: i for i, value in enumerate(sorted({pair[1] for pair in material_pairs}))}
+
+        offset_main = len(categories)
+        offset_materials = offset_main + len(main_categories)
+        features = np.zeros((len(ids), offset_materials + len(materials)), dtype=np.float32)
+        for i, row in enumerate(rows):
+            features[i, categories[row[1]]] = CATEGORY_WEIGHT
+            features[i, offset_main + main_categories[row[2]]] = MAIN_CATEGORY_WEIGHT
+        if material_pairs:
+            product_rows = np.fromiter((index[pair[0]] for pair in material_pairs), dtype=np.int64)
+            material_cols = np.fromiter((materials[pair[1]] for pair in material_pairs), dtype=np.int64)
+            features[product_rows, offset_materials + material_cols] = 1.0
+            # Spread the materials weight over however many materials a product has
+            block = features[:, offset_materials:]
+            counts = block.sum(axis=1, keepdims=True)
+            np.divide(block * MATERIALS_WEIGHT, counts, out=block, where=counts > 0)
+
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        features /= np.maximum(norms, 1e-12)
+
+        log_prices = np.log1p(np.array([float(row[3]) for row in rows], dtype=np.float32))
+        updated_at = [row[4] for row in rows]
+        return ids, features, log_prices, updated_at
+
+    @staticmethod
+    def similarity(rows, features, log_prices):
+        """
+        Score matrix of `rows` against the whole catalog
+        """
+        scores = features[rows] @ features.T
+        price_gap = np.abs(log_prices[rows, None] - log_prices[None, :])
+        scores += PRICE_WEIGHT / (1.0 + price_gap)
+        # A product is never related to itself
+        scores[np.arange(len(rows)), rows] = -np.inf
+        return scores
+
+    @classmethod
+    def top_neighbours(cls, rows, features, log_prices, k):
+        scores = cls.similarity(rows, features, log_prices)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    @classmethod
+    def affected_rows(cls, ids, features, log_prices, updated_at, k, block_size):
+        """
+        Rows whose neighbour lists may have changed since the last build:
+        changed products, products with incomplete lists (new products or
+        neighbours deleted) and products a changed product now outranks or
+        already appears in.
+        """
+        index = {pk: i for i, pk in enumerate(ids)}
+        thresholds = np.full(len(ids), -np.inf, dtype=np.float32)
+        stale = np.ones(len(ids), dtype=bool)
+        summary = RelatedProduct.objects.values('product_id').annotate(
+            entries=Count('id'), lowest=Min('score'), computed=Max('computed_at')
+        ).order_by()
+        for entry in summary:
+            i = index.get(entry['product_id'])
+            if i is None or entry['entries'] < k:
+                continue
+            thresholds[i] = entry['lowest']
+            stale[i] = updated_at[i] > entry['computed']
+
+        if stale.all():
+            return np.arange(len(ids))
+
+        changed = np.flatnonzero(stale)
+        affected = stale.copy()
+        changed_ids = [ids[i] for i in changed]
+        for start in range(0, len(changed_ids), 500):
+            listing = RelatedProduct.objects.filter(related_id__in=changed_ids[start:start + 500])
+            for product_id in listing.values_list('product_id', flat=True).distinct():
+                if product_id in index:
+                    affected[index[product_id]] = True
+        for start in range(0, len(changed), block_size):
+            scores = cls.similarity(changed[start:start + block_size], features, log_prices)
+            affected |= (scores > thresholds[None, :]).any(axis=0)
+        return np.flatnonzero(affected)
+
+    @staticmethod
+    def save_block(ids, rows, neighbours, scores, computed_at):
+        product_ids = [ids[i] for i in rows]
+        entries = [
+            RelatedProduct(
+                product_id=ids[row],
+                related_id=ids[neighbour],
+                rank=rank,
+                score=float(score),
+                computed_at=computed_at,
+            )
+            for row, row_neighbours, row_scores in zip(rows, neighbours, scores)
+            for rank, (neighbour, score) in enumerate(zip(row_neighbours, row_scores), start=1)
+        ]
+        with transaction.atomic():
+            RelatedProduct.objects.filter(product_id__in=product_ids).delete()
+            RelatedProduct.objects.bulk_create(entries, batch_size=1000)
+        return len(entries)
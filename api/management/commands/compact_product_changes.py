@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.models import ProductChange
+from api.services.change_feed import ChangeFeedService
+
+
+class Command(BaseCommand):
+    help = 'Compacts old product change log entries to the latest entry per product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.PRODUCT_CHANGES_RETENTION_DAYS,
+            help='Keep every entry newer than this many days'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Entries deleted per query')
+
+    def handle(self, *args, **options):
+        deleted = ChangeFeedService.compact(options['days'], options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} superseded change entries, {ProductChange.objects.count()} remain'
+        ))
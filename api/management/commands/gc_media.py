@@ -0,0 +1,78 @@
+from datetime import timedelta
+import posixpath
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import models
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Deletes media files that no FileField row references'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Files checked against the database per query')
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=24,
+            help='Only delete files older than this many hours (uploads are stored before their row is saved)'
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report files without deleting them')
+
+    def handle(self, *args, **options):
+        file_fields = [
+            (model, field.name)
+            for model in apps.get_models()
+            for field in model._meta.get_fields()
+            if isinstance(field, models.FileField) and field.storage is default_storage
+        ]
+        cutoff = timezone.now() - timedelta(hours=options['min_age'])
+
+        scanned = deleted = 0
+        batch = []
+        for name in self.walk(''):
+            batch.append(name)
+            if len(batch) >= options['batch_size']:
+                deleted += self.collect(batch, file_fields, cutoff, options['dry_run'])
+                scanned += len(batch)
+                batch = []
+        if batch:
+            deleted += self.collect(batch, file_fields, cutoff, options['dry_run'])
+            scanned += len(batch)
+
+        action = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(f'{action} {deleted} of {scanned} media files'))
+
+    def walk(self, path):
+        """
+        Yield every file name in the storage, one directory listing at a time
+        """
+        directories, files = default_storage.listdir(path)
+        for name in files:
+            yield posixpath.join(path, name)
+        for directory in directories:
+            yield from self.walk(posixpath.join(path, directory))
+
+    def collect(self, names, file_fields, cutoff, dry_run):
+        """
+        Delete the names in this batch that no row references
+        """
+        unreferenced = set(names)
+        for model, field in file_fields:
+            if not unreferenced:
+                break
+            referenced = model._default_manager.filter(**{f'{field}__in': unreferenced}).values_list(field, flat=True)
+            unreferenced.difference_update(referenced)
+
+        deleted = 0
+        for name in sorted(unreferenced):
+            if default_storage.get_modified_time(name) >= cutoff:
+                continue
+            if dry_run:
+                self.stdout.write(f'  {name}')
+            else:
+                default_storage.delete(name)
+            deleted += 1
+        return deleted
@@ -1,6 +1,6 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from api.models import Product, ProductImage, Material, ContactUs, Inquiry, InquiryItems
+from api.models import Product, ProductImage, Material, ContactUs, Inquiry, InquiryLine, Category, MainCategory, SampleType
 from faker import Faker
 import random
 from datetime import timedelta
@@ -33,9 +33,12 @@ class Command(BaseCommand):
 
         # Create Products
         products = []
-        categories = ['Shirts', 'Pants', 'Dresses', 'Jackets', 'Accessories']
-        main_categories = ['Men', 'Women', 'Kids', 'Unisex']
-        sample_types = ['Production', 'Development', 'Prototype']
+        categories = [Category.objects.get_or_create(name=name)[0]
+                      for name in ['Shirts', 'Pants', 'Dresses', 'Jackets', 'Accessories']]
+        main_categories = [MainCategory.objects.get_or_create(name=name)[0]
+                           for name in ['Men', 'Women', 'Kids', 'Unisex']]
+        sample_types = [SampleType.objects.get_or_create(name=name)[0]
+                        for name in ['Production', 'Development', 'Prototype']]
 
         for _ in range(900):
             date = timezone.now() - timedelta(days=random.randint(1, 365))
@@ -81,11 +84,12 @@ class Command(BaseCommand):
                 created_at=timezone.now() - timedelta(days=random.randint(1, 30))
             )
             
-            # Create and add random inquiry items
+            # Create random inquiry lines
             num_items = random.randint(1, 5)
-            for product in random.sample(products, k=num_items):
-                item = InquiryItems.objects.create(product=product)
-                inquiry.items.add(item)
+            InquiryLine.objects.bulk_create(
+                InquiryLine(inquiry=inquiry, product=product, quantity=random.randint(1, 3))
+                for product in random.sample(products, k=num_items)
+            )
             
             inquiries.append(inquiry)
         
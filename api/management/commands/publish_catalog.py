@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.services.catalog_publisher import CatalogPublisher
+
+
+class Command(BaseCommand):
+    help = 'Publishes the product catalog as static content-hashed JSON files for a CDN or web server'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=settings.CATALOG_PAGE_SIZE)
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Re-render every shard instead of only those whose products changed'
+        )
+
+    def handle(self, *args, **options):
+        page_size = min(options['page_size'], settings.MAX_PAGE_SIZE)
+        summary = CatalogPublisher.publish(page_size=page_size, full=options['full'])
+        if summary is None:
+            raise CommandError('Another catalog publish is running, try again later')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Published {summary["products"]} products in {summary["pages"]} pages to '
+            f'{settings.CATALOG_PUBLISH_ROOT} in {summary["seconds"]:.2f}s: '
+            f'{summary["rendered_products"]} products re-rendered, {summary["written_files"]} files written, '
+            f'{summary["removed_files"]} old files removed'
+        ))
@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.db import connections
+from api.models import Product
+from api.services.analytics_service import AnalyticsService
+from api.services.catalog_index import CatalogIndex
+from api.services.product_service import ProductService, LIST_FIELDS, PRODUCT_FIELDS, DETAIL_INCLUDE, NO_FILTERS
+
+STARTUP_LOCK_KEY = 'warm_cache:startup'
+
+
+class Command(BaseCommand):
+    help = 'Fills the product response cache for the first list pages and the most inquired products'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5, help='Number of list pages to warm')
+        parser.add_argument('--page-size', type=int, default=settings.DEFAULT_PAGE_SIZE)
+        parser.add_argument('--top', type=int, default=50, help='Number of product detail pages to warm')
+        parser.add_argument('--days', type=int, default=30, help='Window used to rank products by inquiries')
+        parser.add_argument('--concurrency', type=int, default=4, help='Maximum number of worker threads')
+        parser.add_argument(
+            '--startup',
+            action='store_true',
+            help='Post-deploy run from a starting worker (see core/wsgi.py): '
+                 'a shared cache is warmed by the first worker only'
+        )
+
+    def handle(self, *args, **options):
+        shared = self.shared_cache()
+        if options['startup']:
+            # A process-local cache is warmed by every worker for itself
+            if shared and not cache.add(STARTUP_LOCK_KEY, 1, settings.WARM_CACHE_STARTUP_LOCK_TIMEOUT):
+                self.stdout.write('Cache is already being warmed by another worker')
+                return
+        elif not shared:
+            self.stdout.write(self.style.WARNING(
+                'The default cache is process-local; entries warmed here are not visible to web workers. '
+                'Set REDIS_URL to use a shared cache.'
+            ))
+
+        page_size = min(options['page_size'], settings.MAX_PAGE_SIZE)
+        product_ids = self.top_products(options['top'], options['days'])
+
+        if CatalogIndex.enabled():
+            # Load once here rather than in every pool thread
+            CatalogIndex.snapshot()
+        tasks = [(self.warm_list_page, (page, page_size)) for page in range(1, options['pages'] + 1)]
+        tasks += [(ProductService.refresh_detail, (pk, PRODUCT_FIELDS, DETAIL_INCLUDE, 'best')) for pk in product_ids]
+
+        started = time.perf_counter()
+        warmed = failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, options['concurrency'])) as executor:
+            futures = [executor.submit(self.run_task, func, args) for func, args in tasks]
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                    warmed += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'Failed to warm entry: {e}')
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {warmed} cache entries ({options["pages"]} list pages, {len(product_ids)} products) '
+            f'in {elapsed:.2f}s, {failed} failed'
+        ))
+
+    @staticmethod
+    def shared_cache():
+        # `cache` is a proxy; the backend instance is behind caches[...]
+        return not isinstance(caches['default'], LocMemCache)
+
+    @staticmethod
+    def warm_list_page(page, page_size):
+        # List pages are answered from the catalog index when it is on
+        # Off the request path, so compress as hard as possible
+        if CatalogIndex.list_page(page, page_size, LIST_FIELDS, (), NO_FILTERS, 'best') is None:
+            ProductService.refresh_list_page(page, page_size, level='best')
+
+    @staticmethod
+    def run_task(func, args):
+        try:
+            return func(*args)
+        finally:
+            # Each pool thread opens its own connection; don't leak it
+            connections.close_all()
+
+    @staticmethod
+    def top_products(limit, days):
+        """
+        Most inquired products over the last `days`, topped up with the newest products
+        """
+        product_ids = [row['id'] for row in AnalyticsService.top_products(days, limit)]
+        if len(product_ids) < limit:
+            product_ids += Product.objects.exclude(id__in=product_ids).order_by('-date').values_list(
+                'id', flat=True
+            )[:limit - len(product_ids)]
+        return product_ids
@@ -0,0 +1,37 @@
+import threading
+
+from django.conf import settings
+from django.http import JsonResponse
+
+
+class WriteLoadSheddingMiddleware:
+    """
+    Caps concurrent write requests (form submissions) per worker process.
+    Requests over the limit are rejected with 503 and Retry-After right away
+    instead of queueing on the database and SMTP, so submission bursts don't
+    take the threads that serve ProductList/ProductDetail.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = tuple(settings.WRITE_SHED_PATHS)
+        self.slots = threading.BoundedSemaphore(settings.WRITE_CONCURRENCY_LIMIT)
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not request.path.startswith(self.paths):
+            return self.get_response(request)
+
+        if not self.slots.acquire(blocking=False):
+            response = JsonResponse(
+                {
+                    'status': 'error',
+                    'message': 'Server is busy, please try again shortly'
+                },
+                status=503
+            )
+            response['Retry-After'] = str(settings.WRITE_SHED_RETRY_AFTER)
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            self.slots.release()
@@ -0,0 +1,90 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:00
+#
+# Existing ids keep their value (so public /products/<uuid:pk>/ URLs stay
+# valid) but are rewritten from 32-char hex text to 16-byte blobs in every
+# table and through table. New rows get time-ordered UUIDv7 ids.
+
+import uuid
+
+import api.fields
+from django.db import migrations
+
+
+def _uuid_columns(apps):
+    """Yield (table, column) for every primary key, FK and M2M column holding an api UUID."""
+    for model in apps.get_app_config('api').get_models(include_auto_created=True):
+        for field in model._meta.concrete_fields:
+            target = field.target_field if field.is_relation else field
+            if isinstance(target, api.fields.CompactUUIDField):
+                yield model._meta.db_table, field.column
+
+
+def _convert_columns(apps, schema_editor, function, from_type):
+    # Backends with a native uuid column type need no data conversion
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.connection.ensure_connection()
+    schema_editor.connection.connection.create_function(function.__name__, 1, function, deterministic=True)
+    qn = schema_editor.quote_name
+    for table, column in _uuid_columns(apps):
+        schema_editor.execute(
+            f'UPDATE {qn(table)} SET {qn(column)} = {function.__name__}({qn(column)}) '
+            f"WHERE typeof({qn(column)}) = '{from_type}'"
+        )
+
+
+def hex_to_bytes(value):
+    return uuid.UUID(value).bytes
+
+
+def bytes_to_hex(value):
+    return uuid.UUID(bytes=value).hex
+
+
+def compact_existing_ids(apps, schema_editor):
+    _convert_columns(apps, schema_editor, hex_to_bytes, 'text')
+
+
+def expand_existing_ids(apps, schema_editor):
+    _convert_columns(apps, schema_editor, bytes_to_hex, 'blob')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_alter_contactus_id_alter_inquiry_id_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contactus',
+            name='id',
+            field=api.fields.CompactUUIDField(default=api.fields.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='inquiry',
+            name='id',
+            field=api.fields.CompactUUIDField(default=api.fields.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='inquiryitems',
+            name='id',
+            field=api.fields.CompactUUIDField(default=api.fields.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='material',
+            name='id',
+            field=api.fields.CompactUUIDField(default=api.fields.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='id',
+            field=api.fields.CompactUUIDField(default=api.fields.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='productimage',
+            name='id',
+            field=api.fields.CompactUUIDField(default=api.fields.uuid7, editable=False, primary_key=True, serialize=False, unique=True),
+        ),
+        migrations.RunPython(compact_existing_ids, expand_existing_ids),
+    ]
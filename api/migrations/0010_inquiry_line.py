@@ -0,0 +1,78 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:01
+
+import api.fields
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def copy_items_to_lines(apps, schema_editor):
+    """Turn Inquiry.items -> InquiryItems rows into one InquiryLine per (inquiry, product)."""
+    Inquiry = apps.get_model('api', 'Inquiry')
+    InquiryLine = apps.get_model('api', 'InquiryLine')
+    rows = (
+        Inquiry.items.through.objects
+        .values('inquiry_id', 'inquiryitems__product_id')
+        .annotate(quantity=Count('id'))
+        .order_by()
+    )
+    InquiryLine.objects.bulk_create(
+        (
+            InquiryLine(
+                inquiry_id=row['inquiry_id'],
+                product_id=row['inquiryitems__product_id'],
+                quantity=row['quantity'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=500,
+    )
+
+
+def copy_lines_to_items(apps, schema_editor):
+    Inquiry = apps.get_model('api', 'Inquiry')
+    InquiryItems = apps.get_model('api', 'InquiryItems')
+    InquiryLine = apps.get_model('api', 'InquiryLine')
+    Through = Inquiry.items.through
+    for line in InquiryLine.objects.iterator():
+        items = InquiryItems.objects.bulk_create(
+            InquiryItems(product_id=line.product_id) for _ in range(line.quantity)
+        )
+        Through.objects.bulk_create(
+            Through(inquiry_id=line.inquiry_id, inquiryitems_id=item.pk) for item in items
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_compact_time_ordered_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InquiryLine',
+            fields=[
+                ('id', api.fields.CompactUUIDField(default=api.fields.uuid7, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('quantity', models.PositiveIntegerField(default=1)),
+                ('inquiry', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='api.inquiry')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inquiry_lines', to='api.product')),
+            ],
+            options={
+                'verbose_name': 'Inquiry Item',
+                'verbose_name_plural': 'Inquiry Items',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='inquiryline',
+            constraint=models.UniqueConstraint(fields=('inquiry', 'product'), name='unique_inquiry_line_product'),
+        ),
+        migrations.RunPython(copy_items_to_lines, copy_lines_to_items),
+        migrations.RemoveField(
+            model_name='inquiry',
+            name='items',
+        ),
+        migrations.DeleteModel(
+            name='InquiryItems',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_inquiry_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactus',
+            index=models.Index(fields=['-created_at', '-id'], name='contactus_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactus',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-created_at', '-id'], name='contactus_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(fields=['-created_at', '-id'], name='inquiry_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inquiry',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-created_at', '-id'], name='inquiry_unread_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:16
+
+import api.fields
+from django.db import migrations, models
+
+
+def seed_existing_products(apps, schema_editor):
+    """Start the log with one entry per existing product so token 0 means a full sync."""
+    Product = apps.get_model('api', 'Product')
+    ProductChange = apps.get_model('api', 'ProductChange')
+    ProductChange.objects.bulk_create(
+        (
+            ProductChange(product_id=pk, action='created')
+            for pk in Product.objects.order_by('date', 'id').values_list('id', flat=True).iterator()
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_inbox_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('product_id', api.fields.CompactUUIDField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product_id', 'id'], name='product_change_product_idx')],
+            },
+        ),
+        migrations.RunPython(seed_existing_products, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,148 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+REFERENCE_FIELDS = (
+    ('category', 'Category'),
+    ('main_category', 'MainCategory'),
+    ('sample_type', 'SampleType'),
+)
+
+
+def names_to_ids(apps, schema_editor):
+    """Create one lookup row per distinct name and point every product at it."""
+    Product = apps.get_model('api', 'Product')
+    for field, model_name in REFERENCE_FIELDS:
+        Model = apps.get_model('api', model_name)
+        names = Product.objects.order_by().values_list(field, flat=True).distinct()
+        Model.objects.bulk_create(Model(name=name) for name in names)
+        for pk, name in Model.objects.values_list('id', 'name'):
+            Product.objects.filter(**{field: name}).update(**{f'{field}_ref': pk})
+
+
+def ids_to_names(apps, schema_editor):
+    Product = apps.get_model('api', 'Product')
+    for field, model_name in REFERENCE_FIELDS:
+        Model = apps.get_model('api', model_name)
+        for pk, name in Model.objects.values_list('id', 'name'):
+            Product.objects.filter(**{f'{field}_ref': pk}).update(**{field: name})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_product_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Categories',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='MainCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Main Categories',
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='SampleType',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='category_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.category'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='main_category_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.maincategory'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='sample_type_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api.sampletype'),
+        ),
+        migrations.RunPython(names_to_ids, ids_to_names),
+        # A default lets the reverse migration re-add the name columns to existing rows
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='main_category',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='sample_type',
+            field=models.CharField(default='', max_length=50),
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='category',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='main_category',
+        ),
+        migrations.RemoveField(
+            model_name='product',
+            name='sample_type',
+        ),
+        migrations.RenameField(
+            model_name='product',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.RenameField(
+            model_name='product',
+            old_name='main_category_ref',
+            new_name='main_category',
+        ),
+        migrations.RenameField(
+            model_name='product',
+            old_name='sample_type_ref',
+            new_name='sample_type',
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='products', to='api.category'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='main_category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='products', to='api.maincategory'),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='sample_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='products', to='api.sampletype'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-19 15:22
+
+import api.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_reference_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedContactUs',
+            fields=[
+                ('id', api.fields.CompactUUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('email', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archived Contact Us',
+                'verbose_name_plural': 'Archived Contact Us',
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archived_contactus_created_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedInquiry',
+            fields=[
+                ('id', api.fields.CompactUUIDField(editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('email', models.EmailField(max_length=254)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('lines', models.JSONField(default=list)),
+            ],
+            options={
+                'verbose_name': 'Archived Inquiry',
+                'verbose_name_plural': 'Archived Inquiries',
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archived_inquiry_created_idx')],
+            },
+        ),
+    ]
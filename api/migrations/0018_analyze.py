@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Collect planner statistics once, so EstimatedCountPaginator has a row
+    estimate from the start; analyze_db keeps them fresh.
+    """
+
+    dependencies = [
+        ('api', '0017_product_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL('ANALYZE', migrations.RunSQL.noop),
+    ]
@@ -1,8 +1,8 @@
 from django.db import models
-from uuid import uuid4
+from .fields import CompactUUIDField, uuid7
 # Create your models here.
 class ProductImage(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False, unique=True)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False, unique=True)
     image_url = models.FileField(upload_to='product_images/')
 
     def __str__(self):
@@ -10,34 +10,135 @@ class ProductImage(models.Model):
 
 
 class Material(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False, unique=True)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False, unique=True)
     material = models.CharField(max_length=50)
 
     def __str__(self):
         return self.material
 
 
+class ReferenceName(models.Model):
+    """
+    Small lookup table of names, read through services.reference_data.ReferenceData
+    """
+    name = models.CharField(max_length=50, unique=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        abstract = True
+        ordering = ['name']
+
+
+class Category(ReferenceName):
+
+    class Meta(ReferenceName.Meta):
+        verbose_name_plural = 'Categories'
+
+
+class MainCategory(ReferenceName):
+
+    class Meta(ReferenceName.Meta):
+        verbose_name_plural = 'Main Categories'
+
+
+class SampleType(ReferenceName):
+    pass
+
+
+class ReferenceVersion(models.Model):
+    """
+    Change counter of one lookup table, bumped in the transaction that
+    changes the table and compared by every process's ReferenceData copy
+    """
+    table = models.CharField(max_length=100, primary_key=True)  # model label, e.g. api.category
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.table} v{self.version}'
+
+
 class Product(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False, unique=True)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False, unique=True)
     name = models.CharField(max_length=200)
     style_number = models.CharField(max_length=50)
     date = models.DateField()
     description = models.TextField()
-    sample_type = models.CharField(max_length=50)
-    category = models.CharField(max_length=50)
-    main_category = models.CharField(max_length=50)
+    # Lookup tables; serializers render their names from ReferenceData
+    sample_type = models.ForeignKey(SampleType, on_delete=models.PROTECT, related_name='products')
+    # Lookups by category/main category use the composite indexes below
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name='products', db_index=False)
+    main_category = models.ForeignKey(MainCategory, on_delete=models.PROTECT, related_name='products', db_index=False)
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.FileField(upload_to='product_images/')
     images = models.ManyToManyField(ProductImage, related_name='product_images')
     materials = models.ManyToManyField(Material, related_name='product_materials')
+    # Bumped on save and on images/materials changes (see signals.py)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    class Meta:
+        # Match the list orderings (services/product_service.py LIST_ORDERINGS),
+        # so list pages are read in index order instead of sorted
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='product_date_idx'),
+            models.Index(fields=['category', '-date', '-id'], name='product_category_date_idx'),
+            models.Index(fields=['main_category', '-date', '-id'], name='product_main_cat_date_idx'),
+        ]
+
+
+class RelatedProduct(models.Model):
+    """
+    Precomputed top-K similar products, built by the build_related_products command
+    """
+    # The (product, rank) unique index already covers lookups by product
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_entries', db_index=False)
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.product_id} -> {self.related_id} ({self.rank})"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'rank'], name='unique_related_product_rank'),
+        ]
+
+
+class ProductChange(models.Model):
+    """
+    Append-only log of product changes, read by the change feed endpoint.
+    The auto-increment id is the sync token. Not a foreign key so entries
+    for deleted products survive; compact_product_changes keeps only the
+    latest entry per product once entries are old.
+    """
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS = [(CREATED, 'Created'), (UPDATED, 'Updated'), (DELETED, 'Deleted')]
+
+    id = models.BigAutoField(primary_key=True)
+    product_id = CompactUUIDField()
+    action = models.CharField(max_length=10, choices=ACTIONS)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.id}: {self.product_id} {self.action}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product_id', 'id'], name='product_change_product_idx'),
+        ]
+
 
 
 class BaseContact(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False, unique=True)
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False, unique=True)
     name = models.CharField(max_length=200)
     email = models.EmailField()
     subject = models.CharField(max_length=200)
@@ -59,30 +160,141 @@ class ContactUs(BaseContact):
     class Meta:
         verbose_name = 'Contact Us'
         verbose_name_plural = 'Contact Us'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='contactus_created_idx'),
+            # Small index for the unread inbox, newest first
+            models.Index(fields=['-created_at', '-id'], name='contactus_unread_idx', condition=models.Q(is_read=False)),
+        ]
+
+class Inquiry(BaseContact):
+
+    is_read = models.BooleanField(default=False)
 
-class InquiryItems(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid4, editable=False, unique=True)
-    product = models.ForeignKey(Product, on_delete=models.CASCADE)
 
     def __str__(self):
-        return f"{self.product.name}"
+        return f"{self.name} - {self.email} - {self.subject}"
     
+    class Meta:
+        verbose_name = 'Inquiry'
+        verbose_name_plural = 'Inquiries'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='inquiry_created_idx'),
+            # Small index for the unread inbox, newest first
+            models.Index(fields=['-created_at', '-id'], name='inquiry_unread_idx', condition=models.Q(is_read=False)),
+        ]
+
+
+class InquiryLine(models.Model):
+    id = CompactUUIDField(primary_key=True, default=uuid7, editable=False, unique=True)
+    # The (inquiry, product) unique index already covers lookups by inquiry
+    inquiry = models.ForeignKey(Inquiry, on_delete=models.CASCADE, related_name='lines', db_index=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='inquiry_lines')
+    quantity = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.product.name} x {self.quantity}"
+
     class Meta:
         verbose_name = 'Inquiry Item'
         verbose_name_plural = 'Inquiry Items'
-    
-class Inquiry(BaseContact):
+        constraints = [
+            models.UniqueConstraint(fields=['inquiry', 'product'], name='unique_inquiry_line_product'),
+        ]
 
-    items = models.ManyToManyField(InquiryItems, blank=True)
-    is_read = models.BooleanField(default=False)
 
+class BaseArchivedContact(models.Model):
+    """
+    Submission moved out of the hot tables by archive_submissions.
+    Keeps the original id and timestamps; only indexed for the admin's ordering.
+    """
+    id = CompactUUIDField(primary_key=True, editable=False)
+    name = models.CharField(max_length=200)
+    email = models.EmailField()
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.name} - {self.email} - {self.subject}"
-    
+
     class Meta:
-        verbose_name = 'Inquiry'
-        verbose_name_plural = 'Inquiries'
+        abstract = True
+
 
+class ArchivedContactUs(BaseArchivedContact):
 
+    class Meta:
+        verbose_name = 'Archived Contact Us'
+        verbose_name_plural = 'Archived Contact Us'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='archived_contactus_created_idx'),
+        ]
+
+
+class ArchivedInquiry(BaseArchivedContact):
+    # [{"product": id, "name": product name at archive time, "quantity": n}, ...]
+    lines = models.JSONField(default=list)
+
+    class Meta:
+        verbose_name = 'Archived Inquiry'
+        verbose_name_plural = 'Archived Inquiries'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='archived_inquiry_created_idx'),
+        ]
+
+
+class DailyInquiryRollup(models.Model):
+    """
+    Inquiry volume per day, maintained by AnalyticsService
+    """
+    day = models.DateField(unique=True)
+    inquiries = models.PositiveIntegerField(default=0)
+    lines = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.inquiries}"
+
+
+class ProductInquiryRollup(models.Model):
+    """
+    Inquiries per product per day, maintained by AnalyticsService
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='inquiry_rollups', db_index=False)
+    day = models.DateField()
+    inquiries = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
 
+    def __str__(self):
+        return f"{self.product_id} {self.day}: {self.inquiries}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['product', 'day'], name='unique_product_inquiry_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'product'], name='product_rollup_day_idx'),
+        ]
+
+
+class CategoryInquiryRollup(models.Model):
+    """
+    Inquiries per product category per day, maintained by AnalyticsService
+    """
+    category = models.CharField(max_length=50)
+    day = models.DateField()
+    inquiries = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.category} {self.day}: {self.inquiries}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'day'], name='unique_category_inquiry_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'category'], name='category_rollup_day_idx'),
+        ]
@@ -0,0 +1,60 @@
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.utils.functional import cached_property
+
+
+def estimate_row_count(model, using='default'):
+    """
+    Planner statistics row estimate for a model's table, or None if unavailable.
+    SQLite needs ANALYZE to have been run to populate sqlite_stat1.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                # One row per index; partial indexes only count their own rows
+                cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table])
+                counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+                return max(counts) if counts else None
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [table])
+                row = cursor.fetchone()
+                return row[0] if row and row[0] >= 0 else None
+    except DatabaseError:
+        return None
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists over large tables.
+    Unfiltered lists use the planner's row estimate (kept fresh by
+    analyze_db) instead of an exact COUNT(*). Other counts stop
+    `count_limit` rows past the requested page: when more rows exist the
+    count is a lower bound that moves forward with the page, so every row
+    stays reachable while the page costs the same however many rows the
+    table holds. `estimated` and `lower_bound` say which one `count` is.
+    """
+    count_limit = 10000
+
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True, page=1):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.requested_page = max(page, 1)
+        self.estimated = False
+        self.lower_bound = False
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list.order_by()
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate > self.count_limit:
+                self.estimated = True
+                return estimate
+        limit = self.requested_page * self.per_page + self.count_limit
+        count = queryset[:limit + 1].count()
+        if count > limit:
+            self.lower_bound = True
+            return limit
+        return count
@@ -1,5 +1,22 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import Product, ProductImage, Material, ContactUs, Inquiry, InquiryItems
+from .models import Product, ProductImage, Material, ContactUs, Inquiry, InquiryLine, Category, MainCategory, SampleType
+from .services.analytics_service import AnalyticsService
+from .services.reference_data import ReferenceData
+
+
+class ReferenceNameField(serializers.Field):
+    '''
+    Renders a lookup table id (category_id, ...) as its name from ReferenceData
+    '''
+    def __init__(self, model, **kwargs):
+        self.model = model
+        kwargs.setdefault('read_only', True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return ReferenceData.name(self.model, value)
+
 
 class ProductImageSerializer(serializers.ModelSerializer):
     class Meta:
@@ -7,12 +24,22 @@ class ProductImageSerializer(serializers.ModelSerializer):
         fields = ['id', 'image_url']
 
 class MaterialSerializer(serializers.ModelSerializer):
+    '''
+    The name comes from ReferenceData, so only material ids need to be loaded
+    '''
+    material = serializers.SerializerMethodField()
+
+    def get_material(self, obj):
+        return ReferenceData.name(Material, obj.pk)
+
     class Meta:
         model = Material
         fields = ['id', 'material']
 
 
 class ProductSerializer(serializers.ModelSerializer):
+    category = ReferenceNameField(Category, source='category_id')
+    main_category = ReferenceNameField(MainCategory, source='main_category_id')
 
     class Meta:
         model = Product
@@ -21,8 +48,22 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 class ProductDetailSerializer(serializers.ModelSerializer):
+    '''
+    Takes an optional `fields` argument to return only a subset of fields
+    (sparse fieldsets, see ProductService.parse_projection)
+    '''
     images = ProductImageSerializer(many=True)
     materials = MaterialSerializer(many=True)
+    sample_type = ReferenceNameField(SampleType, source='sample_type_id')
+    category = ReferenceNameField(Category, source='category_id')
+    main_category = ReferenceNameField(MainCategory, source='main_category_id')
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
 
     class Meta:
         model = Product
@@ -36,37 +77,37 @@ class ContactUsSerializer(serializers.ModelSerializer):
 
 
 
-class InquiryItemsSerializer(serializers.ModelSerializer):
+class InquiryLineSerializer(serializers.ModelSerializer):
     class Meta:
-        model = InquiryItems
-        fields = ['id', 'product']
+        model = InquiryLine
+        fields = ['id', 'product', 'quantity']
+        extra_kwargs = {'quantity': {'min_value': 1}}
 
 
 
 class InquirySerializer(serializers.ModelSerializer):
-    items = InquiryItemsSerializer(many=True, required=False)
+    items = InquiryLineSerializer(many=True, required=False, source='lines')
     
     class Meta:
         model = Inquiry
         fields = ['id', 'name', 'email', 'subject', 'message', 'items']
 
+    @transaction.atomic
     def create(self, validated_data):
-        items_data = validated_data.pop('items', [])
+        lines_data = validated_data.pop('lines', [])
         inquiry = Inquiry.objects.create(**validated_data)
         
-        # Create and add items
-        if items_data:
-            for item_data in items_data:
-                item = InquiryItems.objects.create(**item_data)
-                inquiry.items.add(item)
+        # Merge repeated products into one line and insert all lines at once
+        quantities = {}
+        for line_data in lines_data:
+            product = line_data['product']
+            quantities[product] = quantities.get(product, 0) + line_data.get('quantity', 1)
+        lines = InquiryLine.objects.bulk_create(
+            InquiryLine(inquiry=inquiry, product=product, quantity=quantity)
+            for product, quantity in quantities.items()
+        )
+        
+        # Keep the analytics rollups in step with the new inquiry
+        AnalyticsService.record_inquiry(inquiry, lines)
         
         return inquiry
-
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        representation['items'] = InquiryItemsSerializer(instance.items.all(), many=True).data
-        return representation
-
-
-
-
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from ..models import Category, DailyInquiryRollup, ProductInquiryRollup, CategoryInquiryRollup
+from .reference_data import ReferenceData
+
+BUCKETS = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+class AnalyticsService:
+    """
+    Maintains and reads the inquiry rollup tables. Reports only ever read
+    rollup rows inside the requested window, so their cost does not grow
+    with the amount of inquiry history.
+    """
+
+    @staticmethod
+    def _increment(model, lookup, **counts):
+        """
+        Add `counts` to the rollup row matching `lookup`, creating it if needed
+        """
+        updates = {field: F(field) + value for field, value in counts.items()}
+        if model.objects.filter(**lookup).update(**updates):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**lookup, **counts)
+        except IntegrityError:
+            # Another request created the row first
+            model.objects.filter(**lookup).update(**updates)
+
+    @classmethod
+    def record_inquiry(cls, inquiry, lines):
+        """
+        Add a newly created inquiry and its lines to the rollups.
+        Call inside the transaction that creates the inquiry.
+        """
+        day = timezone.localdate(inquiry.created_at)
+        total_quantity = sum(line.quantity for line in lines)
+        cls._increment(DailyInquiryRollup, {'day': day}, inquiries=1, lines=len(lines), quantity=total_quantity)
+
+        categories = {}
+        for line in lines:
+            cls._increment(
+                ProductInquiryRollup, {'product_id': line.product_id, 'day': day},
+                inquiries=1, quantity=line.quantity
+            )
+            category = ReferenceData.name(Category, line.product.category_id)
+            categories[category] = categories.get(category, 0) + line.quantity
+        for category, quantity in categories.items():
+            cls._increment(
+                CategoryInquiryRollup, {'category': category, 'day': day},
+                inquiries=1, quantity=quantity
+            )
+
+    @staticmethod
+    def window_start(days):
+        return timezone.localdate() - timedelta(days=days - 1)
+
+    @classmethod
+    def window(cls, days):
+        """
+        (first, last) day of the window. Bounding both ends (rollups never
+        lie in the future) lets SQLite pick the day index over a full scan.
+        """
+        return cls.window_start(days), timezone.localdate()
+
+    @classmethod
+    def series(cls, days, bucket='day'):
+        """
+        Inquiry volume for the last `days` days grouped into day/week/month buckets
+        """
+        rows = DailyInquiryRollup.objects.filter(day__range=cls.window(days))
+        trunc = BUCKETS[bucket]
+        period = trunc('day') if trunc else F('day')
+        return list(
+            rows.annotate(period=period).values('period').annotate(
+                inquiries=Sum('inquiries'), lines=Sum('lines'), quantity=Sum('quantity')
+            ).order_by('period')
+        )
+
+    @classmethod
+    def top_products(cls, days, limit):
+        rows = ProductInquiryRollup.objects.filter(day__range=cls.window(days))
+        return [
+            {
+                'id': row['product_id'],
+                'name': row['product__name'],
+                'inquiries': row['total_inquiries'],
+                'quantity': row['total_quantity'],
+            }
+            for row in rows.values('product_id', 'product__name').annotate(
+                total_inquiries=Sum('inquiries'), total_quantity=Sum('quantity')
+            ).order_by('-total_inquiries', '-total_quantity')[:limit]
+        ]
+
+    @classmethod
+    def top_categories(cls, days, limit):
+        rows = CategoryInquiryRollup.objects.filter(day__range=cls.window(days))
+        return list(
+            rows.values('category').annotate(
+                inquiries=Sum('inquiries'), quantity=Sum('quantity')
+            ).order_by('-inquiries', '-quantity')[:limit]
+        )
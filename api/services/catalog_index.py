@@ -0,0 +1,229 @@
+"""
+In-process columnar index of the product list view.
+
+Every worker keeps the list fields of all products in memory: one
+ProductRow (a __slots__ record with the values already rendered) per
+product, plus NumPy columns for the filterable fields and one precomputed
+permutation per ordering in LIST_ORDERINGS. A list request is then a
+boolean mask, a fancy-indexed permutation and a slice, with no ORM or
+database work. The page is rendered and precompressed once per snapshot
+(render_compressed) and kept both in the snapshot and in the shared
+product cache under the snapshot's version, so repeated requests, other
+workers and warm_cache reuse the same bytes.
+
+The index is rebuilt when the ProductChange log (written for every product
+change) has moved past the version it was built from. Changes made in this
+process mark it stale right after commit; other processes' changes are
+picked up by a version check at most every CATALOG_INDEX_CHECK_INTERVAL
+seconds. Requests the index can't answer (embedded relations, detail-only
+fields) and any failure fall back to ProductService and the database.
+"""
+
+from collections import OrderedDict
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db.models import Max
+from ..models import Product, ProductChange, Category, MainCategory
+from ..serializers import ProductSerializer
+from .compression import render_compressed
+from .product_service import ProductService, LIST_FIELDS, LIST_ORDERINGS, DEFAULT_ORDERING
+from .reference_data import ReferenceData
+
+logger = logging.getLogger(__name__)
+
+
+class ProductRow:
+    """
+    List fields of one product, rendered as the API returns them
+    """
+    __slots__ = ('id', 'name', 'style_number', 'date', 'category_id', 'main_category_id', 'price', 'image')
+
+    def as_dict(self, fields):
+        values = {
+            'id': self.id,
+            'name': self.name,
+            'style_number': self.style_number,
+            'date': self.date,
+            'category': ReferenceData.name(Category, self.category_id),
+            'main_category': ReferenceData.name(MainCategory, self.main_category_id),
+            'price': self.price,
+            'image': self.image,
+        }
+        return {name: values[name] for name in fields}
+
+
+class CatalogSnapshot:
+    """
+    Index built from one read of the product table, replaced (never modified) on change
+    """
+    __slots__ = (
+        'version', 'rows', 'category', 'main_category', 'orders', 'built_at', 'checked_at',
+        'entries', 'entries_lock',
+    )
+
+    def __init__(self, version, records):
+        self.version = version
+        serializer_fields = ProductSerializer().fields
+        date_field, price_field = serializer_fields['date'], serializer_fields['price']
+
+        self.rows = []
+        for pk, name, style_number, date, category_id, main_category_id, price, image in records:
+            row = ProductRow()
+            row.id = str(pk)
+            row.name = name
+            row.style_number = style_number
+            row.date = date_field.to_representation(date)
+            row.category_id = category_id
+            row.main_category_id = main_category_id
+            row.price = price_field.to_representation(price)
+            row.image = default_storage.url(image) if image else None
+            self.rows.append(row)
+
+        # Records arrive in the default ordering, so row number is its rank
+        count = len(records)
+        self.category = np.fromiter((r[4] for r in records), dtype=np.int64, count=count)
+        self.main_category = np.fromiter((r[5] for r in records), dtype=np.int64, count=count)
+        prices = np.fromiter((float(r[6]) for r in records), dtype=np.float64, count=count)
+        # Dense rank of names in code point order, like SQLite's BINARY collation
+        _, names = np.unique(np.array([r[1] for r in records], dtype=str), return_inverse=True)
+        rank = np.arange(count)
+
+        # Same orders as LIST_ORDERINGS; np.lexsort sorts by its last key first
+        self.orders = {
+            '-date': rank,
+            'date': rank[::-1].copy(),
+            'price': np.lexsort((rank, prices)),
+            '-price': np.lexsort((rank, -prices)),
+            'name': np.lexsort((rank, names)),
+            '-name': np.lexsort((rank, -names)),
+        }
+        self.built_at = self.checked_at = time.monotonic()
+        # Rendered, compressed pages of this snapshot, least recently used first
+        self.entries = OrderedDict()
+        self.entries_lock = threading.Lock()
+
+    def query(self, page, page_size, fields, filters):
+        category, main_category, ordering = filters
+        order = self.orders[ordering]
+
+        mask = None
+        for column, model, value in (
+            (self.category, Category, category),
+            (self.main_category, MainCategory, main_category),
+        ):
+            if value is None:
+                continue
+            ids = [pk for pk, name in ReferenceData.names(model).items() if name == value]
+            matches = np.isin(column, ids)
+            mask = matches if mask is None else mask & matches
+        if mask is not None:
+            order = order[mask[order]]
+
+        offset = (page - 1) * page_size
+        products = [self.rows[i].as_dict(fields) for i in order[offset:offset + page_size]]
+        return ProductService.list_body(products, page, page_size, len(order))
+
+    def entry(self, page, page_size, fields, filters, level='fast'):
+        """
+        render_compressed() entry of a list page, rendered once per snapshot
+        """
+        key = f'{ProductService.list_cache_key(page, page_size, fields, (), filters)}:index:{self.version}'
+        with self.entries_lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+
+        entry = cache.get(key)
+        if entry is None:
+            entry = render_compressed(self.query(page, page_size, fields, filters), level)
+            cache.set(key, entry, settings.PRODUCT_CACHE_TIMEOUT)
+        with self.entries_lock:
+            self.entries[key] = entry
+            while len(self.entries) > settings.CATALOG_INDEX_RESPONSE_CACHE_SIZE:
+                self.entries.popitem(last=False)
+        return entry
+
+
+class CatalogIndex:
+    """
+    Process-wide holder of the current CatalogSnapshot
+    """
+
+    _snapshot = None
+    _stale = False
+    _rebuild_lock = threading.Lock()
+
+    @classmethod
+    def enabled(cls):
+        return settings.CATALOG_INDEX_ENABLED
+
+    @classmethod
+    def load(cls):
+        """
+        Build a new snapshot from the database and make it current
+        """
+        with cls._rebuild_lock:
+            return cls._build()
+
+    @classmethod
+    def _build(cls):
+        # Read the version first: a change landing during the read is picked up next check
+        version = cls.current_version()
+        cls._stale = False
+        records = list(Product.objects.order_by(*LIST_ORDERINGS[DEFAULT_ORDERING]).values_list(
+            'id', 'name', 'style_number', 'date', 'category_id', 'main_category_id', 'price', 'image'
+        ))
+        cls._snapshot = CatalogSnapshot(version, records)
+        logger.info(f"Loaded catalog index with {len(records)} products")
+        return cls._snapshot
+
+    @staticmethod
+    def current_version():
+        return ProductChange.objects.aggregate(version=Max('id'))['version'] or 0
+
+    @classmethod
+    def mark_stale(cls):
+        cls._stale = True
+
+    @classmethod
+    def snapshot(cls):
+        """
+        Return an up to date snapshot. While one thread rebuilds, the
+        others keep answering from the previous snapshot.
+        """
+        snapshot = cls._snapshot
+        if snapshot is None:
+            return cls.load()
+
+        now = time.monotonic()
+        stale = cls._stale
+        if not stale and now - snapshot.checked_at >= settings.CATALOG_INDEX_CHECK_INTERVAL:
+            snapshot.checked_at = now
+            stale = cls.current_version() != snapshot.version
+        if stale and cls._rebuild_lock.acquire(blocking=False):
+            try:
+                return cls._build()
+            finally:
+                cls._rebuild_lock.release()
+        return snapshot
+
+    @classmethod
+    def list_page(cls, page, page_size, fields, include, filters, level='fast'):
+        """
+        Return the precompressed list entry for this request (see
+        compression.render_compressed), or None if it has to go to the database
+        """
+        if not cls.enabled() or include or not set(fields) <= set(LIST_FIELDS):
+            return None
+        try:
+            return cls.snapshot().entry(page, page_size, fields, filters, level)
+        except Exception as e:
+            logger.error(f"Catalog index query failed, falling back to the database: {str(e)}")
+            return None
@@ -0,0 +1,249 @@
+"""
+Static catalog snapshots.
+
+CatalogPublisher renders the product list pages and product details with
+the same builders as the API and writes them as content-hashed JSON files
+under CATALOG_PUBLISH_ROOT:
+
+    manifest.json                   short-lived, points at the current shards
+    pages/<page>.<hash>.json        list pages of CATALOG_PAGE_SIZE products
+    products/<id>.<hash>.json       one file per product
+
+Shard names change whenever their content does, so a CDN or nginx can serve
+them with a far-future Cache-Control and only manifest.json has to be
+revalidated. Precompressed .gz/.br siblings are written next to each shard
+for gzip_static/brotli_static. Every file is written to a temporary name and
+renamed into place, and the manifest is replaced last, so readers never see
+a partial file or a manifest pointing at a missing shard.
+"""
+
+from datetime import datetime, timezone
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from ..models import Product
+from .compression import render_compressed
+from .product_service import ProductService, LIST_ORDERING
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+SHARD_DIRS = ('pages', 'products')
+LOCK_KEY = 'catalog:publish:lock'
+
+# Suffixes written for each encoding returned by render_compressed
+ENCODING_SUFFIXES = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+
+
+class CatalogPublisher:
+    """
+    Publishes the catalog incrementally: a product detail is re-rendered only
+    when its updated_at moved, and a list page only when its members or one
+    of their products changed (or the total count changed, which every page
+    reports in its pagination block).
+    """
+
+    _state_lock = threading.Lock()
+    _pending = False
+    _worker = None
+
+    @staticmethod
+    def root():
+        return Path(settings.CATALOG_PUBLISH_ROOT)
+
+    @classmethod
+    def load_manifest(cls):
+        try:
+            with open(cls.root() / MANIFEST_NAME, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+        return manifest if manifest.get('version') == MANIFEST_VERSION else {}
+
+    @classmethod
+    def publish(cls, page_size=None, full=False):
+        """
+        Bring the published catalog up to date.
+        Returns a summary dict, or None if another publish holds the lock.
+        """
+        if not cache.add(LOCK_KEY, 1, timeout=settings.CATALOG_PUBLISH_LOCK_TIMEOUT):
+            return None
+        try:
+            return cls._publish(page_size or settings.CATALOG_PAGE_SIZE, full)
+        finally:
+            cache.delete(LOCK_KEY)
+
+    @classmethod
+    def _publish(cls, page_size, full):
+        started = time.perf_counter()
+        root = cls.root()
+        for name in SHARD_DIRS:
+            (root / name).mkdir(parents=True, exist_ok=True)
+
+        previous = {} if full else cls.load_manifest()
+        rows = list(Product.objects.order_by(*LIST_ORDERING).values_list('id', 'updated_at'))
+        total = len(rows)
+        total_pages = (total + page_size - 1) // page_size
+
+        # Product details
+        previous_products = previous.get('products', {})
+        products = {}
+        stale = []
+        stamps = dict(rows)
+        for pk, updated_at in rows:
+            key = str(pk)
+            old = previous_products.get(key)
+            if old and old['updated_at'] == updated_at.isoformat() and (root / old['path']).exists():
+                products[key] = old
+            else:
+                stale.append(pk)
+
+        written = 0
+        for start in range(0, len(stale), settings.CATALOG_PUBLISH_BATCH_SIZE):
+            batch = stale[start:start + settings.CATALOG_PUBLISH_BATCH_SIZE]
+            for pk, body in ProductService.build_details(batch).items():
+                path, created = cls.write_shard('products', str(pk), body)
+                written += created
+                products[str(pk)] = {'path': path, 'updated_at': stamps[pk].isoformat()}
+        changed = {str(pk) for pk in stale}
+
+        # List pages
+        reuse_pages = previous.get('page_size') == page_size and previous.get('total_items') == total
+        previous_pages = previous.get('pages', []) if reuse_pages else []
+        pages = []
+        for index in range(max(total_pages, 1)):
+            members = [str(pk) for pk, _ in rows[index * page_size:(index + 1) * page_size]]
+            digest = hashlib.md5(','.join(members).encode()).hexdigest()
+            old = previous_pages[index] if index < len(previous_pages) else None
+            if (old and old['members'] == digest and changed.isdisjoint(members)
+                    and (root / old['path']).exists()):
+                pages.append(old)
+                continue
+            body = ProductService.build_list_page(index + 1, page_size)
+            path, created = cls.write_shard('pages', str(index + 1), body)
+            written += created
+            pages.append({'path': path, 'members': digest})
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'page_size': page_size,
+            'total_items': total,
+            'total_pages': total_pages,
+            'pages': pages,
+            'products': products,
+        }
+        cls.write_atomic(root / MANIFEST_NAME, json.dumps(manifest, separators=(',', ':')).encode())
+        removed = cls.prune(manifest)
+
+        summary = {
+            'products': total,
+            'rendered_products': len(stale),
+            'pages': len(pages),
+            'written_files': written,
+            'removed_files': removed,
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Published catalog: {summary}")
+        return summary
+
+    @classmethod
+    def write_shard(cls, directory, name, body):
+        """
+        Write one response body under a content-hashed name.
+        Returns (path relative to the root, whether anything was written).
+        """
+        # Written once and served many times, so compress as hard as possible
+        entry = render_compressed(body, 'best')
+        digest = hashlib.sha256(entry['identity']).hexdigest()[:16]
+        path = f'{directory}/{name}.{digest}.json'
+        target = cls.root() / path
+        if target.exists():
+            # Same name means same content
+            return path, False
+        # Compressed siblings first, so the identity file only appears once all encodings exist
+        for encoding, data in sorted(entry.items(), key=lambda item: item[0] == 'identity'):
+            cls.write_atomic(target.with_name(target.name + ENCODING_SUFFIXES[encoding]), data)
+        return path, True
+
+    @staticmethod
+    def write_atomic(target, data):
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, target)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    @classmethod
+    def prune(cls, manifest):
+        """
+        Delete shards the manifest no longer references, once they are older
+        than CATALOG_PRUNE_AFTER (clients may still hold the previous manifest)
+        """
+        referenced = {entry['path'] for entry in manifest['pages']}
+        referenced.update(entry['path'] for entry in manifest['products'].values())
+        cutoff = time.time() - settings.CATALOG_PRUNE_AFTER
+        removed = 0
+        for name in SHARD_DIRS:
+            for file in (cls.root() / name).iterdir():
+                relative = f'{name}/{file.name}'
+                base = relative.removesuffix('.gz').removesuffix('.br')
+                if base in referenced:
+                    continue
+                try:
+                    if file.stat().st_mtime < cutoff:
+                        file.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+    @classmethod
+    def schedule(cls):
+        """
+        Publish in a background thread. Calls made while a publish is running
+        are coalesced into one more run after it finishes.
+        """
+        with cls._state_lock:
+            cls._pending = True
+            if cls._worker is None:
+                cls._worker = threading.Thread(target=cls._drain, name='catalog-publisher', daemon=True)
+                cls._worker.start()
+
+    @classmethod
+    def _drain(cls):
+        try:
+            while True:
+                with cls._state_lock:
+                    if not cls._pending:
+                        cls._worker = None
+                        return
+                    cls._pending = False
+                try:
+                    if cls.publish() is None:
+                        # Another process is publishing and may have missed our change
+                        time.sleep(settings.CATALOG_PUBLISH_RETRY_DELAY)
+                        with cls._state_lock:
+                            cls._pending = True
+                except Exception as e:
+                    logger.error(f"Catalog publish failed: {str(e)}")
+        finally:
+            # This thread's connection is not managed by the request cycle
+            connection.close()
@@ -0,0 +1,88 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+from ..models import ProductChange
+from .product_service import ProductService
+
+
+class ChangeFeedService:
+    """
+    Writes and reads the ProductChange log behind /api/products/changes/.
+    A sync token is the id of the last log entry a client has applied;
+    token 0 replays the whole (compacted) log, i.e. a full sync.
+    """
+
+    @staticmethod
+    def record(product_ids, action):
+        ProductChange.objects.bulk_create(
+            ProductChange(product_id=pk, action=action) for pk in product_ids
+        )
+
+    @staticmethod
+    def parse_token(value):
+        try:
+            token = int(value)
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid since token")
+        if token < 0:
+            raise ValidationError("Invalid since token")
+        return token
+
+    @staticmethod
+    def changes_since(token, limit):
+        """
+        Return the feed body for entries after `token`.
+        Several entries for the same product collapse into its current
+        state, so the response size follows the number of changed products.
+        """
+        entries = list(
+            ProductChange.objects.filter(id__gt=token).order_by('id').values_list('id', 'product_id', 'action')[:limit + 1]
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        next_token = entries[-1][0] if entries else token
+        if not entries and token > (ProductChange.objects.aggregate(last=Max('id'))['last'] or 0):
+            # Tokens are only ever handed out by this endpoint
+            raise ValidationError("Invalid since token")
+
+        latest = {}
+        for _, product_id, action in entries:
+            latest[product_id] = action
+        bodies = ProductService.build_details(
+            [pk for pk, action in latest.items() if action != ProductChange.DELETED]
+        )
+        # A product deleted after the last entry of this batch is reported as deleted
+        deleted = [str(pk) for pk in latest if pk not in bodies]
+        return {
+            'status': 'success',
+            'message': 'Product changes fetched successfully',
+            'changes': {
+                'updated': [body['product'] for body in bodies.values()],
+                'deleted': deleted,
+            },
+            'next_token': str(next_token),
+            'has_more': has_more,
+        }
+
+    @staticmethod
+    def compact(older_than_days=None, batch_size=1000):
+        """
+        Delete entries older than the retention window unless they are the
+        latest entry for their product. Every token stays valid: a client
+        still sees each product's final state, just not the intermediate steps.
+        Returns the number of entries deleted.
+        """
+        days = settings.PRODUCT_CHANGES_RETENTION_DAYS if older_than_days is None else older_than_days
+        cutoff = timezone.now() - timedelta(days=days)
+        latest = ProductChange.objects.filter(product_id=OuterRef('product_id')).order_by('-id').values('id')[:1]
+        superseded = ProductChange.objects.filter(created_at__lt=cutoff).exclude(id=Subquery(latest))
+
+        deleted = 0
+        while True:
+            ids = list(superseded.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += ProductChange.objects.filter(id__in=ids).delete()[0]
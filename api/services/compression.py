@@ -0,0 +1,99 @@
+import gzip
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Same threshold as GZipMiddleware: smaller bodies don't benefit
+MIN_COMPRESS_LENGTH = 200
+
+# Preferred order when the client accepts several encodings equally
+PREFERRED_ENCODINGS = ('br', 'gzip', 'identity')
+
+# (gzip level, brotli quality). Requests compress on a cache miss, so they use
+# moderate levels; offline callers (publish_catalog, warm_cache) use the maximum.
+COMPRESSION_LEVELS = {
+    'fast': (6, 5),
+    'best': (9, 11),
+}
+
+
+def render_compressed(data, level='fast'):
+    """
+    Render `data` as JSON once and precompress it, so cache hits can be
+    served in whichever encoding the client accepts without any CPU spent
+    on compression. Returns a dict of encoding -> body bytes.
+    `level` is a key of COMPRESSION_LEVELS.
+    """
+    body = JSONRenderer().render(data)
+    entry = {'identity': body}
+    if len(body) < MIN_COMPRESS_LENGTH:
+        return entry
+
+    gzip_level, brotli_quality = COMPRESSION_LEVELS[level]
+    compressed = gzip.compress(body, compresslevel=gzip_level, mtime=0)
+    if len(compressed) < len(body):
+        entry['gzip'] = compressed
+    if brotli is not None:
+        compressed = brotli.compress(body, quality=brotli_quality)
+        if len(compressed) < len(body):
+            entry['br'] = compressed
+    return entry
+
+
+def parse_accept_encoding(header):
+    """
+    Return {encoding: q} for an Accept-Encoding header
+    """
+    accepted = {}
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token] = q
+    return accepted
+
+
+def choose_encoding(header, available):
+    """
+    Pick the best encoding from `available` that the client accepts
+    """
+    accepted = parse_accept_encoding(header or '')
+    wildcard = accepted.get('*')
+    best, best_q = None, 0.0
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, wildcard)
+        if q is None:
+            # identity is acceptable unless explicitly refused
+            q = 0.001 if encoding == 'identity' else 0.0
+        if q > best_q:
+            best, best_q = encoding, q
+    return best or 'identity'
+
+
+def compressed_response(request, entry, status=200):
+    """
+    Build an HttpResponse from a render_compressed() entry for `request`
+    """
+    encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'), entry)
+    response = HttpResponse(entry[encoding], status=status, content_type='application/json')
+    if encoding != 'identity':
+        response['Content-Encoding'] = encoding
+    response['Content-Length'] = str(len(entry[encoding]))
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
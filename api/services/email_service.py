@@ -48,11 +48,15 @@ class EmailService:
         try:
             # Get product details
             product_details = []
-            for item in inquiry.items.all():
+            lines = inquiry.lines.select_related('product').only(
+                'quantity', 'product__name', 'product__style_number', 'product__price'
+            )
+            for line in lines:
                 product_details.append({
-                    'name': item.product.name,
-                    'style_number': item.product.style_number,
-                    'price': item.product.price
+                    'name': line.product.name,
+                    'style_number': line.product.style_number,
+                    'price': line.product.price,
+                    'quantity': line.quantity
                 })
 
             # Prepare email content
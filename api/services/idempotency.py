@@ -0,0 +1,114 @@
+from functools import wraps
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyService:
+    """
+    Cache-backed store of responses to form submissions, so client retries
+    get the original response instead of writing rows and sending emails again.
+
+    Requests with an Idempotency-Key header are stored under that key and
+    the client for IDEMPOTENCY_KEY_TTL, so a key presented by
+    another client never replays someone else's submission. Requests
+    without one fall back to a hash of the client and body, kept
+    for IDEMPOTENCY_DEDUPE_WINDOW.
+    """
+
+    @staticmethod
+    def client(request):
+        # Same identity as the rate limits: X-Forwarded-For only behind NUM_PROXIES trusted proxies
+        return BaseThrottle().get_ident(request)
+
+    @staticmethod
+    def fingerprint(request):
+        data = request.data
+        if hasattr(data, 'lists'):
+            data = dict(data.lists())
+        body = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha256(body.encode()).hexdigest()
+
+    @staticmethod
+    def store_key(scope, kind, value):
+        return f'idempotency:{scope}:{kind}:{hashlib.sha256(value.encode()).hexdigest()}'
+
+    @staticmethod
+    def replay(stored):
+        return Response(stored['data'], status=stored['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(scope):
+    """
+    Decorator for APIView.post methods, see IdempotencyService
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            client_key = request.headers.get('Idempotency-Key')
+            fingerprint = IdempotencyService.fingerprint(request)
+            client = IdempotencyService.client(request)
+
+            if client_key is not None:
+                if not client_key or len(client_key) > MAX_KEY_LENGTH:
+                    return Response(
+                        {
+                            'status': 'error',
+                            'message': 'Invalid Idempotency-Key header'
+                        },
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                store_key = IdempotencyService.store_key(scope, 'key', f'{client}:{client_key}')
+                timeout = settings.IDEMPOTENCY_KEY_TTL
+            else:
+                store_key = IdempotencyService.store_key(scope, 'body', f'{client}:{fingerprint}')
+                timeout = settings.IDEMPOTENCY_DEDUPE_WINDOW
+
+            stored = cache.get(store_key)
+            if stored is not None:
+                if stored['fingerprint'] != fingerprint:
+                    return Response(
+                        {
+                            'status': 'error',
+                            'message': 'Idempotency-Key was already used with a different request'
+                        },
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                logger.info(f"Replayed stored {scope} response")
+                return IdempotencyService.replay(stored)
+
+            # Only one request per key may run the write path at a time
+            lock_key = f'{store_key}:lock'
+            if not cache.add(lock_key, 1, timeout=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                return Response(
+                    {
+                        'status': 'error',
+                        'message': 'A request with the same Idempotency-Key is in progress'
+                    },
+                    status=status.HTTP_409_CONFLICT,
+                    headers={'Retry-After': '1'}
+                )
+            try:
+                response = view_method(self, request, *args, **kwargs)
+                # Failed requests are not stored so the client can correct and retry
+                if status.is_success(response.status_code):
+                    cache.set(store_key, {
+                        'fingerprint': fingerprint,
+                        'status': response.status_code,
+                        'data': response.data,
+                    }, timeout)
+                return response
+            finally:
+                cache.delete(lock_key)
+        return wrapper
+    return decorator
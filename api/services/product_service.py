@@ -0,0 +1,203 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
+from ..models import Product, ProductImage, Material
+from ..serializers import ProductSerializer, ProductDetailSerializer
+from .compression import render_compressed
+
+# Scalar fields a client may ask for with ?fields=, in output order
+PRODUCT_FIELDS = tuple(
+    name for name in ProductDetailSerializer.Meta.fields if name not in ('images', 'materials')
+)
+LIST_FIELDS = tuple(ProductSerializer.Meta.fields)
+
+# Related collections a client may embed with ?include=
+PRODUCT_RELATIONS = {
+    'images': lambda: Prefetch('images', queryset=ProductImage.objects.only('id', 'image_url')),
+    # Material names are rendered from ReferenceData, only the ids are loaded
+    'materials': lambda: Prefetch('materials', queryset=Material.objects.only('id')),
+}
+DETAIL_INCLUDE = ('images', 'materials')
+
+# Orderings accepted by ?ordering=. Each ends in a unique key so pages are
+# stable; ties fall back to the default newest-first order.
+LIST_ORDERINGS = {
+    '-date': ('-date', '-id'),
+    'date': ('date', 'id'),
+    'price': ('price', '-date', '-id'),
+    '-price': ('-price', '-date', '-id'),
+    'name': ('name', '-date', '-id'),
+    '-name': ('-name', '-date', '-id'),
+}
+DEFAULT_ORDERING = '-date'
+LIST_ORDERING = LIST_ORDERINGS[DEFAULT_ORDERING]
+
+# List filters as (category name, main category name, ordering)
+NO_FILTERS = (None, None, DEFAULT_ORDERING)
+
+
+class ProductService:
+    """
+    Builds product list/detail response bodies and keeps them in the shared
+    cache already rendered and compressed (see compression.render_compressed).
+    Views and the warm_cache command go through the same builders so a
+    warmed entry is exactly what a request would have produced.
+
+    Every builder takes a projection: the scalar `fields` to select and the
+    relations to `include`. Only those columns are loaded and only those
+    relations are prefetched, and the projection is part of the cache key.
+    """
+
+    @staticmethod
+    def parse_projection(fields_param, include_param, default_fields, default_include):
+        """
+        Turn ?fields= and ?include= values into canonical (fields, include) tuples
+        """
+        if fields_param is None:
+            fields = default_fields
+        else:
+            requested = {name.strip() for name in fields_param.split(',') if name.strip()}
+            unknown = requested - set(PRODUCT_FIELDS)
+            if unknown:
+                raise ValidationError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            # id is always returned so clients can address the product
+            fields = tuple(name for name in PRODUCT_FIELDS if name in requested or name == 'id')
+
+        if include_param is None:
+            include = default_include
+        else:
+            requested = {name.strip() for name in include_param.split(',') if name.strip()}
+            unknown = requested - set(PRODUCT_RELATIONS)
+            if unknown:
+                raise ValidationError(f"Unknown include: {', '.join(sorted(unknown))}")
+            include = tuple(name for name in PRODUCT_RELATIONS if name in requested)
+        return fields, include
+
+    @staticmethod
+    def parse_filters(params):
+        """
+        Turn ?category=, ?main_category= and ?ordering= into a filters tuple (see NO_FILTERS)
+        """
+        ordering = params.get('ordering', DEFAULT_ORDERING)
+        if ordering not in LIST_ORDERINGS:
+            raise ValidationError(f"Unknown ordering: {ordering}, use one of {', '.join(LIST_ORDERINGS)}")
+        return (params.get('category') or None, params.get('main_category') or None, ordering)
+
+    @staticmethod
+    def filtered(queryset, filters):
+        category, main_category, _ = filters
+        if category is not None:
+            queryset = queryset.filter(category__name=category)
+        if main_category is not None:
+            queryset = queryset.filter(main_category__name=main_category)
+        return queryset
+
+    @staticmethod
+    def projection_key(fields, include):
+        projection = ','.join(fields) + '|' + ','.join(include)
+        return hashlib.md5(projection.encode()).hexdigest()[:12]
+
+    @classmethod
+    def list_cache_key(cls, page, page_size, fields=LIST_FIELDS, include=(), filters=NO_FILTERS):
+        key = f'products:v4:list:{page}:{page_size}:{cls.projection_key(fields, include)}'
+        if filters != NO_FILTERS:
+            key += ':' + hashlib.md5(repr(filters).encode()).hexdigest()[:12]
+        return key
+
+    @classmethod
+    def detail_cache_key(cls, pk, fields=PRODUCT_FIELDS, include=DETAIL_INCLUDE):
+        return f'products:v3:detail:{pk}:{cls.projection_key(fields, include)}'
+
+    @staticmethod
+    def projected_queryset(fields, include):
+        return Product.objects.only(*fields).prefetch_related(
+            *(PRODUCT_RELATIONS[name]() for name in include)
+        )
+
+    @classmethod
+    def build_list_page(cls, page, page_size, fields=LIST_FIELDS, include=(), filters=NO_FILTERS):
+        """
+        Return the response body for one list page
+        """
+        # Calculate offset
+        offset = (page - 1) * page_size
+
+        # Only select the requested fields with pagination
+        products = cls.filtered(cls.projected_queryset(fields, include), filters).order_by(
+            *LIST_ORDERINGS[filters[2]]
+        )[offset:offset + page_size]
+
+        # Get total count for pagination
+        total_count = cls.filtered(Product.objects.all(), filters).count()
+
+        serializer = ProductDetailSerializer(products, many=True, fields=fields + include)
+        return cls.list_body(serializer.data, page, page_size, total_count)
+
+    @staticmethod
+    def list_body(products, page, page_size, total_count):
+        return {
+            'status': 'success',
+            'message': 'Products fetched successfully',
+            'products': products,
+            'pagination': {
+                'current_page': page,
+                'page_size': page_size,
+                'total_items': total_count,
+                'total_pages': (total_count + page_size - 1) // page_size
+            }
+        }
+
+    @classmethod
+    def build_detail(cls, pk, fields=PRODUCT_FIELDS, include=DETAIL_INCLUDE):
+        """
+        Return the response body for one product, raises Product.DoesNotExist
+        """
+        product = cls.projected_queryset(fields, include).get(pk=pk)
+        return cls.detail_body(product, fields, include)
+
+    @classmethod
+    def build_details(cls, pks, fields=PRODUCT_FIELDS, include=DETAIL_INCLUDE):
+        """
+        Return {pk: response body} for many products with one query per relation
+        """
+        products = cls.projected_queryset(fields, include).filter(pk__in=pks)
+        return {product.pk: cls.detail_body(product, fields, include) for product in products}
+
+    @staticmethod
+    def detail_body(product, fields, include):
+        return {
+            'status': 'success',
+            'message': 'Product details fetched successfully',
+            'product': ProductDetailSerializer(product, fields=fields + include).data
+        }
+
+    @classmethod
+    def refresh_list_page(cls, page, page_size, fields=LIST_FIELDS, include=(), filters=NO_FILTERS, level='fast'):
+        entry = render_compressed(cls.build_list_page(page, page_size, fields, include, filters), level)
+        cache.set(
+            cls.list_cache_key(page, page_size, fields, include, filters), entry, settings.PRODUCT_CACHE_TIMEOUT
+        )
+        return entry
+
+    @classmethod
+    def refresh_detail(cls, pk, fields=PRODUCT_FIELDS, include=DETAIL_INCLUDE, level='fast'):
+        entry = render_compressed(cls.build_detail(pk, fields, include), level)
+        cache.set(cls.detail_cache_key(pk, fields, include), entry, settings.PRODUCT_CACHE_TIMEOUT)
+        return entry
+
+    @classmethod
+    def get_list_page(cls, page, page_size, fields=LIST_FIELDS, include=(), filters=NO_FILTERS):
+        entry = cache.get(cls.list_cache_key(page, page_size, fields, include, filters))
+        if entry is None:
+            entry = cls.refresh_list_page(page, page_size, fields, include, filters)
+        return entry
+
+    @classmethod
+    def get_detail(cls, pk, fields=PRODUCT_FIELDS, include=DETAIL_INCLUDE):
+        entry = cache.get(cls.detail_cache_key(pk, fields, include))
+        if entry is None:
+            entry = cls.refresh_detail(pk, fields, include)
+        return entry
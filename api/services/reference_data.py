@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from ..models import Category, MainCategory, SampleType, Material, ReferenceVersion
+
+# Lookup models held in memory and the column holding each one's display name
+REFERENCE_MODELS = {
+    Category: 'name',
+    MainCategory: 'name',
+    SampleType: 'name',
+    Material: 'material',
+}
+
+
+class ReferenceData:
+    """
+    In-process cache of the small lookup tables, so serializers turn ids
+    into names without a query or a join.
+
+    Every table has a ReferenceVersion row, bumped by invalidate() in the
+    transaction that changes the table (see signals.py). Living in the
+    database, the version is shared by every process whatever the cache
+    backend. A process reloads its copy of a table when the version it
+    holds differs, checking at most every REFERENCE_DATA_CHECK_INTERVAL
+    seconds; changes made by the process itself are seen immediately.
+    """
+
+    # model -> (version, checked_at, {pk: name})
+    _tables = {}
+
+    @staticmethod
+    def version(model):
+        return ReferenceVersion.objects.filter(table=model._meta.label_lower).values_list(
+            'version', flat=True
+        ).first() or 0
+
+    @classmethod
+    def names(cls, model):
+        """
+        Return {pk: name} for a reference model
+        """
+        entry = cls._tables.get(model)
+        now = time.monotonic()
+        if entry is not None and now - entry[1] < settings.REFERENCE_DATA_CHECK_INTERVAL:
+            return entry[2]
+
+        version = cls.version(model)
+        if entry is not None and entry[0] == version:
+            cls._tables[model] = (version, now, entry[2])
+            return entry[2]
+
+        table = dict(model.objects.order_by().values_list('pk', REFERENCE_MODELS[model]))
+        cls._tables[model] = (version, now, table)
+        return table
+
+    @classmethod
+    def name(cls, model, pk):
+        if pk is None:
+            return None
+        table = cls.names(model)
+        if pk not in table:
+            # Added by another process since our last check
+            cls._tables.pop(model, None)
+            table = cls.names(model)
+        return table.get(pk)
+
+    @classmethod
+    def invalidate(cls, model):
+        """
+        Bump the table's version as part of the current transaction, so every
+        process reloads on its next check once it commits, and drop this
+        process's copy on commit
+        """
+        label = model._meta.label_lower
+        if not ReferenceVersion.objects.filter(table=label).update(version=F('version') + 1):
+            ReferenceVersion.objects.get_or_create(table=label, defaults={'version': 1})
+        transaction.on_commit(lambda: cls._tables.pop(model, None))
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Product, ProductChange, Category, MainCategory, SampleType, Material
+from .services.catalog_index import CatalogIndex
+from .services.catalog_publisher import CatalogPublisher
+from .services.change_feed import ChangeFeedService
+from .services.reference_data import ReferenceData
+
+# Product lookup used to find the products showing a reference row's name
+REFERENCE_PRODUCT_LOOKUPS = {
+    Category: 'category',
+    MainCategory: 'main_category',
+    SampleType: 'sample_type',
+    Material: 'materials',
+}
+
+
+def schedule_catalog_publish():
+    # This process's catalog index reloads on its next request
+    transaction.on_commit(CatalogIndex.mark_stale)
+    if settings.CATALOG_AUTOPUBLISH:
+        # Publish what was committed, not what may still be rolled back
+        transaction.on_commit(CatalogPublisher.schedule)
+
+
+def touch_products(product_ids):
+    """
+    Bump updated_at and log a change for products whose output changed
+    without Product.save() being called
+    """
+    Product.objects.filter(pk__in=product_ids).update(updated_at=timezone.now())
+    ChangeFeedService.record(product_ids, ProductChange.UPDATED)
+    schedule_catalog_publish()
+
+
+@receiver(m2m_changed, sender=Product.images.through)
+@receiver(m2m_changed, sender=Product.materials.through)
+def touch_product_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Bump Product.updated_at when its images or materials change, so
+    incremental jobs keyed on updated_at pick the product up.
+    """
+    if not reverse:
+        if action not in ('post_add', 'post_remove', 'post_clear'):
+            return
+        product_ids = [instance.pk]
+    elif action == 'pre_clear':
+        # clear() from the image/material side doesn't provide pk_set
+        product_ids = list(
+            sender.objects.filter(**{instance._meta.model_name: instance.pk}).values_list('product_id', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        product_ids = list(pk_set)
+    else:
+        return
+    if product_ids:
+        touch_products(product_ids)
+
+
+@receiver(post_save, sender=Product)
+def record_product_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    ChangeFeedService.record([instance.pk], ProductChange.CREATED if created else ProductChange.UPDATED)
+    schedule_catalog_publish()
+
+
+@receiver(post_delete, sender=Product)
+def record_product_delete(sender, instance, **kwargs):
+    ChangeFeedService.record([instance.pk], ProductChange.DELETED)
+    schedule_catalog_publish()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=MainCategory)
+@receiver(post_save, sender=SampleType)
+@receiver(post_save, sender=Material)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=MainCategory)
+@receiver(pre_delete, sender=SampleType)
+@receiver(pre_delete, sender=Material)
+def reference_data_changed(sender, instance, raw=False, created=False, **kwargs):
+    """
+    Reload the ReferenceData cache everywhere once the change is committed,
+    and mark products rendering the changed name as updated
+    """
+    if raw:
+        return
+    ReferenceData.invalidate(sender)
+    if created:
+        return
+    # pre_delete: collected before the M2M rows are removed with the material
+    product_ids = list(
+        Product.objects.filter(**{REFERENCE_PRODUCT_LOOKUPS[sender]: instance.pk}).values_list('pk', flat=True)
+    )
+    if product_ids:
+        touch_products(product_ids)
@@ -0,0 +1,82 @@
+"""
+Content-addressed media storage.
+
+Uploads are streamed to a temporary file by HashingUploadHandler, which
+computes their SHA-256 while the chunks arrive. ContentAddressedStorage then
+stores each file under its hash:
+
+    product_images/3f/a2/3fa2...c9.jpg
+
+so the same photo uploaded for many products is stored once and every row
+points at the same name. Files are never overwritten or deleted on row
+changes; the gc_media command removes files no row references.
+"""
+
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+def hash_file(content):
+    """
+    SHA-256 of a Django File, read in chunks
+    """
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Writes every upload straight to a temporary file on disk (never into
+    memory) and hashes each chunk on the way, so the storage doesn't have
+    to read the file again.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.content_hash = self.digest.hexdigest()
+        return upload
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names files by the SHA-256 of their content,
+    inside the directory chosen by the field's upload_to
+    """
+
+    def hashed_name(self, name, content):
+        content_hash = getattr(content, 'content_hash', None) or hash_file(content)
+        directory = posixpath.dirname(name.replace('\\', '/'))
+        extension = os.path.splitext(name)[1].lower()
+        return posixpath.join(directory, content_hash[:2], content_hash[2:4], content_hash + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if self.exists(name):
+            # Already stored: reference the existing file
+            return name
+        saved = super().save(name, content, max_length=max_length)
+        if saved != name and self.exists(name):
+            # Another request stored the same content concurrently
+            self.delete(saved)
+            return name
+        return saved
@@ -1,3 +1,411 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+import os
+import random
+import re
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import (
+    Product, ProductImage, Material, Category, MainCategory, SampleType, ProductChange,
+    ContactUs, Inquiry, InquiryLine, ArchivedInquiry,
+    DailyInquiryRollup, ProductInquiryRollup, CategoryInquiryRollup,
+)
+from .services.idempotency import IdempotencyService
+from .throttling import SlidingWindowRateThrottle
+
+PLAN_TABLE = re.compile(r'^(?:SCAN|SEARCH) (\S+)')
+SKIPPED_STATEMENTS = ('INSERT', 'SAVEPOINT', 'RELEASE', 'ROLLBACK', 'BEGIN', 'COMMIT', 'PRAGMA')
+
+# Plans accepted on purpose: (endpoint label pattern, SQL pattern, reason)
+ALLOWED = [
+    (r'^product list', r'^SELECT COUNT\(\*\) AS "__count" FROM "api_product"',
+     'exact total_items for the product list; only reached when the catalog index is off'),
+    (r'^inquiry analytics$', r'FROM "api_(product|category)inquiryrollup" .*WHERE .*"day" BETWEEN',
+     'top-N by summed counts has to aggregate and sort the rollup rows inside the window'),
+    (r'^admin inquiry$', r'FROM "api_inquiryline" .*WHERE "api_inquiryline"."inquiry_id" = ',
+     "sorts one inquiry's lines"),
+]
+
+
+# Requests are served from the database: no response cache, no catalog index
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+    CATALOG_INDEX_ENABLED=False,
+    CATALOG_AUTOPUBLISH=False,
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class QueryPlanTests(TestCase):
+    """
+    Seeds a large dataset, calls every API endpoint and admin changelist,
+    runs EXPLAIN QUERY PLAN on each SQL statement and fails on full scans or
+    temp B-trees on tables above MIN_ROWS. A failing endpoint's plan report
+    is in the failure message; set QUERY_PLAN_REPORT=1 to print every report.
+    """
+    PRODUCTS = 5000
+    SUBMISSIONS = 5000  # inquiries and contact messages each
+    MIN_ROWS = 1000  # only tables with at least this many rows are checked
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(0)
+        categories = Category.objects.bulk_create(Category(name=f'Category {i}') for i in range(10))
+        main_categories = MainCategory.objects.bulk_create(MainCategory(name=f'Main {i}') for i in range(4))
+        sample_types = SampleType.objects.bulk_create(SampleType(name=f'Sample {i}') for i in range(3))
+        materials = Material.objects.bulk_create(Material(material=f'Material {i}') for i in range(20))
+        images = ProductImage.objects.bulk_create(
+            ProductImage(image_url=f'product_images/seed_{i}.jpg') for i in range(200)
+        )
+
+        today = timezone.localdate()
+        products = Product.objects.bulk_create(
+            (
+                Product(
+                    name=f'Product {i}',
+                    style_number=f'STY-{i}',
+                    date=today - timedelta(days=rng.randint(0, 1000)),
+                    description='Seeded product',
+                    sample_type=rng.choice(sample_types),
+                    category=rng.choice(categories),
+                    main_category=rng.choice(main_categories),
+                    price=rng.randint(1000, 50000) / 100,
+                    image=f'product_images/seed_{i}.jpg',
+                )
+                for i in range(cls.PRODUCTS)
+            ),
+            batch_size=500,
+        )
+        Product.materials.through.objects.bulk_create(
+            (
+                Product.materials.through(product_id=product.pk, material_id=material.pk)
+                for product in products for material in rng.sample(materials, 2)
+            ),
+            batch_size=500,
+        )
+        Product.images.through.objects.bulk_create(
+            (
+                Product.images.through(product_id=product.pk, productimage_id=image.pk)
+                for product in products for image in rng.sample(images, 2)
+            ),
+            batch_size=500,
+        )
+        ProductChange.objects.bulk_create(
+            (ProductChange(product_id=product.pk, action=ProductChange.CREATED) for product in products),
+            batch_size=500,
+        )
+
+        contact = {'name': 'Seed', 'email': 'seed@example.com', 'subject': 'Seeded', 'message': 'Seeded message'}
+        inquiries = Inquiry.objects.bulk_create(
+            (Inquiry(is_read=rng.random() < 0.9, **contact) for _ in range(cls.SUBMISSIONS)), batch_size=500
+        )
+        InquiryLine.objects.bulk_create(
+            (
+                InquiryLine(inquiry=inquiry, product=product, quantity=rng.randint(1, 5))
+                for inquiry in inquiries for product in rng.sample(products, 2)
+            ),
+            batch_size=500,
+        )
+        ContactUs.objects.bulk_create(
+            (ContactUs(is_read=rng.random() < 0.9, **contact) for _ in range(cls.SUBMISSIONS)), batch_size=500
+        )
+        ArchivedInquiry.objects.bulk_create(
+            (
+                ArchivedInquiry(id=inquiry.pk, created_at=inquiry.created_at, updated_at=inquiry.updated_at, **contact)
+                for inquiry in Inquiry.objects.bulk_create(Inquiry(**contact) for _ in range(cls.SUBMISSIONS))
+            ),
+            batch_size=500,
+        )
+        Inquiry.objects.filter(pk__in=ArchivedInquiry.objects.values('pk')).delete()
+        # Spread submissions over a year, as in production (created_at is auto_now_add)
+        with connection.cursor() as cursor:
+            for table in ('api_inquiry', 'api_contactus'):
+                cursor.execute(
+                    f"UPDATE {table} SET created_at = datetime(created_at, '-' || (abs(random()) % 365) || ' days')"
+                )
+
+        call_command('backfill_inquiry_rollups', stdout=StringIO())
+        call_command('build_related_products', '--full', stdout=StringIO())
+        cls.user = User.objects.create_superuser('plans', 'plans@example.com', 'plans')
+        # Give the planner (and EstimatedCountPaginator) real statistics
+        call_command('analyze_db', stdout=StringIO())
+
+    def endpoints(self):
+        product = Product.objects.order_by('-date', '-id')[100]
+        category = Category.objects.first().name
+        inquiry = Inquiry.objects.first()
+        since = ProductChange.objects.order_by('-id').values_list('id', flat=True)[50]
+        inquiry_body = {
+            'name': 'Plan', 'email': 'plan@example.com', 'subject': 'Plans', 'message': 'Checking plans',
+            'items': [{'product': str(product.pk), 'quantity': 2}],
+        }
+        contact_body = {'name': 'Plan', 'email': 'plan@example.com', 'subject': 'Plans', 'message': 'Checking plans'}
+        return [
+            ('product list', 'get', '/api/products/', None),
+            ('product list, deep page', 'get', '/api/products/?page=200&page_size=20', None),
+            ('product list, sparse fields', 'get', '/api/products/?fields=name,price', None),
+            ('product list, category filter', 'get', f'/api/products/?category={category}', None),
+            ('product list, embedded relations', 'get', '/api/products/?include=images,materials', None),
+            ('product detail', 'get', f'/api/products/{product.pk}/', None),
+            ('product related', 'get', f'/api/products/{product.pk}/related/', None),
+            ('product changes', 'get', f'/api/products/changes/?since={since}', None),
+            ('inquiry submission', 'post', '/api/inquiry/', inquiry_body),
+            ('contact submission', 'post', '/api/contact-us/', contact_body),
+            ('inquiry analytics', 'get', '/api/analytics/inquiries/?days=30&bucket=week', None),
+            ('admin inquiries', 'get', '/admin/api/inquiry/', None),
+            ('admin unread inquiries', 'get', '/admin/api/inquiry/?is_read__exact=0', None),
+            ('admin inquiry', 'get', f'/admin/api/inquiry/{inquiry.pk}/change/', None),
+            ('admin inquiry items', 'get', '/admin/api/inquiryline/', None),
+            ('admin contact messages', 'get', '/admin/api/contactus/', None),
+            ('admin unread contact messages', 'get', '/admin/api/contactus/?is_read__exact=0', None),
+            ('admin products', 'get', '/admin/api/product/', None),
+            ('admin archived inquiries', 'get', '/admin/api/archivedinquiry/', None),
+        ]
+
+    def test_endpoints_use_indexes(self):
+        self.client.force_login(self.user)
+        self.row_counts = {}
+        for label, method, path, data in self.endpoints():
+            with self.subTest(endpoint=label):
+                report, problems = self.check_endpoint(label, method, path, data)
+                if os.getenv('QUERY_PLAN_REPORT'):
+                    print(report)
+                self.assertEqual(problems, 0, f'{problems} query plan problems\n{report}')
+
+    def check_endpoint(self, label, method, path, data):
+        """
+        Call one endpoint and return (plan report, number of problems)
+        """
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'post':
+                response = self.client.post(path, data, content_type='application/json')
+            else:
+                response = self.client.get(path)
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if not query['sql'].lstrip().upper().startswith(SKIPPED_STATEMENTS)
+        ]
+
+        lines = [
+            f'== {label}: {method.upper()} {path} -> {response.status_code}, '
+            f'{len(queries.captured_queries)} queries'
+        ]
+        problems = 0
+        if response.status_code >= 400:
+            lines.append(f'   !! request failed with {response.status_code}')
+            problems += 1
+
+        for number, sql in enumerate(statements, 1):
+            lines.append(f'  [{number}] {sql[:160]}{"..." if len(sql) > 160 else ""}')
+            allowed = next(
+                (
+                    reason for label_pattern, sql_pattern, reason in ALLOWED
+                    if re.search(label_pattern, label) and re.search(sql_pattern, sql)
+                ),
+                None
+            )
+            for detail, problem in self.explain(sql):
+                if problem and allowed:
+                    lines.append(f'      {detail}  (allowed: {allowed})')
+                elif problem:
+                    lines.append(f'   !! {detail}  <- {problem}')
+                    problems += 1
+                else:
+                    lines.append(f'      {detail}')
+        return '\n'.join(lines), problems
+
+    def explain(self, sql):
+        """
+        Yield (plan line, problem or None) for one statement
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[3] for row in cursor.fetchall()]
+
+        large = set()
+        for detail in plan:
+            match = PLAN_TABLE.match(detail)
+            if match and self.row_count(match.group(1)) >= self.MIN_ROWS:
+                large.add(match.group(1))
+
+        # An index walk is only cheap if the rows stream out in order and stop at the LIMIT
+        streams = (
+            re.search(r'\bLIMIT\b', sql) is not None
+            and 'GROUP BY' not in sql
+            and not any('TEMP B-TREE' in detail for detail in plan)
+        )
+        for detail in plan:
+            match = PLAN_TABLE.match(detail)
+            problem = None
+            if match and match.group(1) in large and detail.startswith('SCAN'):
+                rows = self.row_counts[match.group(1)]
+                if ' USING ' not in detail:
+                    problem = f'full table scan of {rows} rows'
+                elif not streams:
+                    problem = f'full index scan of {rows} rows'
+            elif 'TEMP B-TREE' in detail and large:
+                problem = f'sort or grouping in a temp B-tree over {", ".join(sorted(large))}'
+            yield detail, problem
+
+    def row_count(self, table):
+        if table not in self.row_counts:
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+                    self.row_counts[table] = cursor.fetchone()[0]
+                except Exception:
+                    # Subquery or CTE name rather than a table
+                    self.row_counts[table] = 0
+        return self.row_counts[table]
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+@mock.patch.object(SlidingWindowRateThrottle, 'THROTTLE_RATES', {'submissions': '5/min', 'submissions_global': '12/min'})
+class SubmissionThrottleTests(TestCase):
+    """
+    Per client and global limits on the form endpoints (see throttling.SubmissionThrottle)
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def submit(self, number, **headers):
+        body = {'name': 'Test', 'email': 'test@example.com', 'subject': 'Throttle', 'message': f'Message {number}'}
+        return self.client.post('/api/contact-us/', body, content_type='application/json', **headers).status_code
+
+    def test_spoofed_forwarded_for_shares_one_bucket(self):
+        # No trusted proxy (NUM_PROXIES=0): X-Forwarded-For is ignored
+        statuses = [
+            self.submit(i, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}') for i in range(8)
+        ]
+        self.assertEqual(statuses, [201] * 5 + [429] * 3)
+
+    def test_forwarded_for_identifies_clients_behind_a_trusted_proxy(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            first = [self.submit(i, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.1') for i in range(6)]
+            second = self.submit(6, REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.2')
+        self.assertEqual(first, [201] * 5 + [429])
+        self.assertEqual(second, 201)
+
+    def test_rejected_requests_do_not_use_the_global_limit(self):
+        first = [self.submit(i, REMOTE_ADDR='10.0.0.1') for i in range(12)]
+        others = [self.submit(100 + i, REMOTE_ADDR=f'10.0.1.{i}') for i in range(8)]
+        self.assertEqual(first, [201] * 5 + [429] * 7)
+        self.assertEqual(others, [201] * 7 + [429])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1},
+)
+class IdempotencyTests(TestCase):
+    """
+    Idempotency-Key handling on the form endpoints (see services/idempotency.py)
+    """
+    body = {'name': 'Test', 'email': 'test@example.com', 'subject': 'Retry', 'message': 'Original message'}
+
+    def setUp(self):
+        cache.clear()
+
+    def submit(self, body, key='key-1', client='203.0.113.1'):
+        # Behind one trusted proxy, as in production
+        return self.client.post(
+            '/api/contact-us/', body, content_type='application/json',
+            REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=client, HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.submit(self.body)
+        retry = self.submit(self.body)
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.headers.get('Idempotent-Replayed'), 'true')
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(ContactUs.objects.count(), 1)
+
+    def test_key_reused_with_a_different_body_is_rejected(self):
+        self.submit(self.body)
+        response = self.submit({**self.body, 'message': 'Changed message'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(ContactUs.objects.count(), 1)
+
+    def test_key_in_progress_is_rejected(self):
+        store_key = IdempotencyService.store_key('contact-us', 'key', '203.0.113.1:key-1')
+        cache.add(f'{store_key}:lock', 1)
+        response = self.submit(self.body)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.headers.get('Retry-After'), '1')
+        self.assertEqual(ContactUs.objects.count(), 0)
+
+    def test_same_key_from_another_client_is_not_replayed(self):
+        self.submit(self.body)
+        other = self.submit({**self.body, 'message': 'Another client'}, client='203.0.113.2')
+        self.assertEqual(other.status_code, 201)
+        self.assertIsNone(other.headers.get('Idempotent-Replayed'))
+        self.assertEqual(other.json()['data']['message'], 'Another client')
+
+
+class BackfillInquiryRollupsTests(TestCase):
+    """
+    backfill_inquiry_rollups rebuilds the same rollups whether or not
+    archive_submissions has moved inquiries out of the hot tables
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = Category.objects.bulk_create(Category(name=f'Category {i}') for i in range(2))
+        main_category = MainCategory.objects.create(name='Main')
+        sample_type = SampleType.objects.create(name='Sample')
+        products = Product.objects.bulk_create(
+            Product(
+                name=f'Product {i}', style_number=f'STY-{i}', date=timezone.localdate(), description='Product',
+                sample_type=sample_type, category=categories[i % 2], main_category=main_category, price=10,
+                image=f'product_images/{i}.jpg',
+            )
+            for i in range(3)
+        )
+        contact = {'name': 'Test', 'email': 'test@example.com', 'subject': 'Inquiry', 'message': 'Message'}
+        for i, (is_read, lines) in enumerate([
+            (True, [(0, 1), (2, 3)]),
+            (True, [(1, 2)]),
+            (False, [(0, 4), (1, 1)]),
+            (False, [(2, 5)]),
+        ]):
+            inquiry = Inquiry.objects.create(is_read=is_read, **contact)
+            InquiryLine.objects.bulk_create(
+                InquiryLine(inquiry=inquiry, product=products[product], quantity=quantity)
+                for product, quantity in lines
+            )
+        # Two days, so rollups of archived and live inquiries both merge and stand alone
+        Inquiry.objects.filter(is_read=True, lines__product=products[1]).update(
+            created_at=timezone.now() - timedelta(days=1)
+        )
+
+    @staticmethod
+    def rollups():
+        return (
+            sorted(DailyInquiryRollup.objects.values_list('day', 'inquiries', 'lines', 'quantity')),
+            sorted(ProductInquiryRollup.objects.values_list('product_id', 'day', 'inquiries', 'quantity')),
+            sorted(CategoryInquiryRollup.objects.values_list('category', 'day', 'inquiries', 'quantity')),
+        )
+
+    def test_archived_inquiries_are_kept_in_the_rollups(self):
+        call_command('backfill_inquiry_rollups', stdout=StringIO())
+        before = self.rollups()
+        call_command('archive_submissions', '--days', '0', stdout=StringIO())
+        self.assertEqual(ArchivedInquiry.objects.count(), 2)
+        self.assertEqual(Inquiry.objects.count(), 2)
+
+        call_command('backfill_inquiry_rollups', stdout=StringIO())
+        self.assertEqual(self.rollups(), before)
+        self.assertEqual(sum(row[1] for row in before[0]), 4)
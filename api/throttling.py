@@ -0,0 +1,111 @@
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+
+class SlidingWindowRateThrottle(SimpleRateThrottle):
+    """
+    Sliding window rate limit approximated from two fixed-window counters.
+    Counters are bumped with the cache's atomic incr, so every worker shares
+    the same limit through the shared cache, and each request costs one
+    counter update instead of rewriting a list of timestamps like
+    SimpleRateThrottle does. A rejected request is taken back out of the
+    counter, so clients that keep retrying past the limit don't extend it.
+    """
+
+    counter_key = None
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window = int(now // self.duration)
+        elapsed = (now % self.duration) / self.duration
+
+        self.counter_key = f'{self.key}:{window}'
+        self.cache.add(self.counter_key, 0, timeout=self.duration * 2)
+        try:
+            current = self.cache.incr(self.counter_key)
+        except ValueError:
+            # The counter expired between add() and incr()
+            self.cache.set(self.counter_key, 1, timeout=self.duration * 2)
+            current = 1
+        previous = self.cache.get(f'{self.key}:{window - 1}', 0)
+
+        # Weight the previous window by how much of it still overlaps
+        estimate = previous * (1 - elapsed) + current
+        self.remaining = self.duration - (now % self.duration)
+        if estimate > self.num_requests:
+            self.release()
+            return False
+        return True
+
+    def release(self):
+        """
+        Take back the request counted by the last allow_request()
+        """
+        if self.counter_key is None:
+            return
+        try:
+            self.cache.decr(self.counter_key)
+        except ValueError:
+            # The window's counter already expired
+            pass
+        self.counter_key = None
+
+    def wait(self):
+        return self.remaining
+
+
+class SubmissionRateThrottle(SlidingWindowRateThrottle):
+    """
+    Per client IP limit on form submissions
+    """
+    scope = 'submissions'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class GlobalSubmissionRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limit on form submissions across all clients
+    """
+    scope = 'submissions_global'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': 'all'}
+
+
+class SubmissionThrottle(BaseThrottle):
+    """
+    Per client IP limit, then the global limit, on form submissions.
+
+    DRF runs every throttle in throttle_classes even after one rejects, so
+    with the two limits listed separately, requests already rejected per
+    IP still used up the global limit and one client could lock everyone
+    out. Here the global counter is only touched once the per-IP check
+    passes, and a request rejected by either limit is counted by neither.
+    """
+    throttle_classes = (SubmissionRateThrottle, GlobalSubmissionRateThrottle)
+
+    def __init__(self):
+        self.rejected_by = None
+
+    def allow_request(self, request, view):
+        admitted = []
+        for throttle_class in self.throttle_classes:
+            throttle = throttle_class()
+            if not throttle.allow_request(request, view):
+                for earlier in admitted:
+                    earlier.release()
+                self.rejected_by = throttle
+                return False
+            admitted.append(throttle)
+        return True
+
+    def wait(self):
+        return self.rejected_by.wait() if self.rejected_by else None
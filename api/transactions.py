@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+
+@contextmanager
+def write_transaction(using=DEFAULT_DB_ALIAS):
+    """
+    transaction.atomic() for transactions that are going to write.
+
+    On SQLite it starts with BEGIN IMMEDIATE, so the write lock is taken
+    up front and a busy database is waited out on the busy timeout. A
+    deferred transaction that reads first fails with "database is locked"
+    when another connection commits before it upgrades. Everything else
+    (read-only requests, the admin) keeps plain deferred transactions and
+    never blocks on a writer.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic(using=using):
+            yield
+        return
+
+    connection.ensure_connection()
+    mode = connection.transaction_mode
+    connection.transaction_mode = 'IMMEDIATE'
+    try:
+        # BEGIN is issued on entering the outermost atomic block
+        with transaction.atomic(using=using):
+            connection.transaction_mode = mode
+            yield
+    finally:
+        connection.transaction_mode = mode
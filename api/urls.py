@@ -1,13 +1,16 @@
 from django.contrib import admin
 from django.urls import path
-from .views import ProductList, ProductDetail, ContactUsView, InquiryView
+from .views import ProductList, ProductDetail, ProductChanges, RelatedProductList, ContactUsView, InquiryView, InquiryAnalytics
 
 
 
 
 urlpatterns = [
     path('products/', ProductList.as_view(), name='product-list'),
+    path('products/changes/', ProductChanges.as_view(), name='product-changes'),
     path('products/<uuid:pk>/', ProductDetail.as_view(), name='product-detail'),
+    path('products/<uuid:pk>/related/', RelatedProductList.as_view(), name='product-related'),
     path('contact-us/', ContactUsView.as_view(), name='contact-us'),
     path('inquiry/', InquiryView.as_view(), name='inquiry'),
+    path('analytics/inquiries/', InquiryAnalytics.as_view(), name='inquiry-analytics'),
 ] 
@@ -1,29 +1,44 @@
+import json
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.shortcuts import get_object_or_404
 from rest_framework import status
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_cookie
+from rest_framework.permissions import IsAdminUser
 from django.core.exceptions import ValidationError
-from django.db.models import Prefetch
 from django.conf import settings
-from .models import Product, ProductImage, Material, ContactUs, Inquiry
-from .serializers import ProductSerializer, ProductDetailSerializer, ContactUsSerializer, InquirySerializer 
+from .models import Product, ContactUs, Inquiry, RelatedProduct
+from .serializers import ProductSerializer, ContactUsSerializer, InquirySerializer 
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from .services.email_service import EmailService
+from .services.product_service import ProductService, LIST_FIELDS, PRODUCT_FIELDS, DETAIL_INCLUDE
+from .services.analytics_service import AnalyticsService
+from .services.change_feed import ChangeFeedService
+from .services.catalog_index import CatalogIndex
+from .services.idempotency import idempotent
+from .throttling import SubmissionThrottle
+from .transactions import write_transaction
+from .services.compression import compressed_response
+
+
+def cached_product_response(request, entry):
+    '''
+    Serve a cached product body in the best encoding the client accepts.
+    Non-JSON renderers (the browsable API) get a regular DRF response.
+    '''
+    if request.accepted_renderer.format != 'json':
+        return Response(json.loads(entry['identity']), status=status.HTTP_200_OK)
+    return compressed_response(request, entry, status=status.HTTP_200_OK)
 
 class ProductList(APIView):
     '''
     Get all products with pagination
-    used select_related to reduce the number of queries
-    used cache_page to cache the response
+    supports ?fields= and ?include= to select columns and embed relations
+    filters with ?category= and ?main_category=, sorts with ?ordering= (see LIST_ORDERINGS)
+    answered from the in-memory CatalogIndex when it can, otherwise from the
+    shared product cache (see ProductService); either way served precompressed
     '''
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
-    @method_decorator(vary_on_cookie)
     def get(self, request):
         try:
             # Add pagination
@@ -34,38 +49,95 @@ class ProductList(APIView):
             if page < 1 or page_size < 1:
                 raise ValidationError("Invalid pagination parameters")
             
-            # Calculate offset
-            offset = (page - 1) * page_size
+            # Bound page_size so the set of cacheable pages stays small
+            page_size = min(page_size, settings.MAX_PAGE_SIZE)
             
-            # Only select the fields we need for the list view with pagination
-            products = Product.objects.only(
-                'id', 'name', 'style_number', 'date', 
-                'category', 'main_category', 'price', 'image'
-            ).order_by('-date')[offset:offset + page_size]
+            # Sparse fieldsets: ?fields=name,image&include=images
+            fields, include = ProductService.parse_projection(
+                request.GET.get('fields'), request.GET.get('include'), LIST_FIELDS, ()
+            )
             
-            # Get total count for pagination
-            total_count = Product.objects.count()
+            filters = ProductService.parse_filters(request.GET)
             
-            serializer = ProductSerializer(products, many=True)
+            entry = CatalogIndex.list_page(page, page_size, fields, include, filters)
+            if entry is None:
+                entry = ProductService.get_list_page(page, page_size, fields, include, filters)
+            return cached_product_response(request, entry)
+        except ValidationError as e:
             return Response(
-                {   
-                    'status': 'success',
-                    'message': 'Products fetched successfully',
-                    'products': serializer.data,
-                    'pagination': {
-                        'current_page': page,
-                        'page_size': page_size,
-                        'total_items': total_count,
-                        'total_pages': (total_count + page_size - 1) // page_size
-                    }
+                {
+                    'status': 'error',
+                    'message': e.messages[0]
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {
+                    'status': 'error',
+                    'message': 'An error occurred while fetching products'
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class ProductDetail(APIView):
+    '''
+    Get selected id products
+    supports ?fields= and ?include=, only included relations are prefetched
+    served precompressed from the shared product cache (see ProductService)
+    '''
+    def get(self, request, pk):
+        try:
+            # Sparse fieldsets: ?fields=name,price&include=materials
+            fields, include = ProductService.parse_projection(
+                request.GET.get('fields'), request.GET.get('include'), PRODUCT_FIELDS, DETAIL_INCLUDE
+            )
+            
+            entry = ProductService.get_detail(pk, fields, include)
+            return cached_product_response(request, entry)
+        except ValidationError as e:
+            return Response(
+                {
+                    'status': 'error',
+                    'message': e.messages[0]
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Product.DoesNotExist:
+            return Response(
+                {
+                    'status': 'error',
+                    'message': f'Product not found with id: {pk}'
                 },
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except Exception as e:
+            return Response(
+                {
+                    'status': 'error',
+                    'message': 'An error occurred while fetching product details'
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class ProductChanges(APIView):
+    '''
+    Products created, updated or deleted since ?since=<token>
+    start with since=0 for a full sync, then pass back next_token
+    keep requesting while has_more is true
+    '''
+    def get(self, request):
+        try:
+            token = ChangeFeedService.parse_token(request.GET.get('since', 0))
+            return Response(
+                ChangeFeedService.changes_since(token, settings.PRODUCT_CHANGES_PAGE_SIZE),
                 status=status.HTTP_200_OK
             )
         except ValidationError as e:
             return Response(
                 {
                     'status': 'error',
-                    'message': str(e)
+                    'message': e.messages[0]
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
@@ -73,42 +145,35 @@ class ProductList(APIView):
             return Response(
                 {
                     'status': 'error',
-                    'message': 'An error occurred while fetching products'
+                    'message': 'An error occurred while fetching product changes'
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class ProductDetail(APIView):
+class RelatedProductList(APIView):
     '''
-    Get selected id products
-    used select_related and prefetch_related to reduce the number of queries
-    used cache_page to cache the response
+    Get products similar to the selected product
+    reads the precomputed neighbour table (see build_related_products)
+    in a single query on the (product, rank) index
     '''
-    @method_decorator(cache_page(60 * 15))  # Cache for 15 minutes
-    @method_decorator(vary_on_cookie)
     def get(self, request, pk):
         try:
-            # Optimize query with specific prefetch related
-            product = get_object_or_404(
-                Product.objects.prefetch_related(
-                    Prefetch(
-                        'images',
-                        queryset=ProductImage.objects.only('id', 'image_url')
-                    ),
-                    Prefetch(
-                        'materials',
-                        queryset=Material.objects.only('id', 'material')
-                    )
-                ).select_related(),
-                pk=pk
-            )
-            
-            serializer = ProductDetailSerializer(product)
+            entries = RelatedProduct.objects.filter(product_id=pk).select_related('related').only(
+                'rank', 'score',
+                'related__id', 'related__name', 'related__style_number', 'related__date',
+                'related__category', 'related__main_category', 'related__price', 'related__image'
+            ).order_by('rank')
+            
+            # No neighbours is a valid answer for an existing product
+            if not entries and not Product.objects.filter(pk=pk).exists():
+                raise Product.DoesNotExist
+
+            serializer = ProductSerializer([entry.related for entry in entries], many=True)
             return Response(
-                {   
+                {
                     'status': 'success',
-                    'message': 'Product details fetched successfully',
-                    'product': serializer.data
+                    'message': 'Related products fetched successfully',
+                    'products': serializer.data
                 },
                 status=status.HTTP_200_OK
             )
@@ -124,7 +189,55 @@ class ProductDetail(APIView):
             return Response(
                 {
                     'status': 'error',
-                    'message': 'An error occurred while fetching product details'
+                    'message': 'An error occurred while fetching related products'
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class InquiryAnalytics(APIView):
+    '''
+    Inquiry volume over time and most inquired products/categories
+    read from the rollup tables (see AnalyticsService), staff only
+    '''
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            days = int(request.GET.get('days', 30))
+            top = int(request.GET.get('top', 10))
+            bucket = request.GET.get('bucket', 'day')
+
+            # Validate parameters
+            if not 1 <= days <= 366 or not 1 <= top <= 100 or bucket not in ('day', 'week', 'month'):
+                raise ValidationError("Invalid analytics parameters")
+
+            return Response(
+                {
+                    'status': 'success',
+                    'message': 'Inquiry analytics fetched successfully',
+                    'data': {
+                        'days': days,
+                        'bucket': bucket,
+                        'series': AnalyticsService.series(days, bucket),
+                        'top_products': AnalyticsService.top_products(days, top),
+                        'top_categories': AnalyticsService.top_categories(days, top)
+                    }
+                },
+                status=status.HTTP_200_OK
+            )
+        except (ValueError, ValidationError) as e:
+            return Response(
+                {
+                    'status': 'error',
+                    'message': 'Invalid analytics parameters'
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            return Response(
+                {
+                    'status': 'error',
+                    'message': 'An error occurred while fetching inquiry analytics'
                 },
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
@@ -132,11 +245,18 @@ class ProductDetail(APIView):
 class ContactUsView(APIView):
     """
     API view to handle contact form submissions
+    retries are answered from the idempotency store (see IdempotencyService)
+    rate limited per IP and globally (see throttling.py)
     """
+    throttle_classes = [SubmissionThrottle]
+
+    @idempotent('contact-us')
     def post(self, request):
         serializer = ContactUsSerializer(data=request.data)
         if serializer.is_valid():
-            contact = serializer.save()
+            # Returns once the row is committed (and synced, see DATABASES)
+            with write_transaction():
+                contact = serializer.save()
             
             # Send email using the service
             email_sent = EmailService.send_contact_email(contact)
@@ -164,11 +284,18 @@ class ContactUsView(APIView):
 class InquiryView(APIView):
     """
     API view to handle inquiry form submissions
+    retries are answered from the idempotency store (see IdempotencyService)
+    rate limited per IP and globally (see throttling.py)
     """
+    throttle_classes = [SubmissionThrottle]
+
+    @idempotent('inquiry')
     def post(self, request):
         serializer = InquirySerializer(data=request.data)
         if serializer.is_valid():
-            inquiry = serializer.save()
+            # Inquiry, lines and rollups commit together, synced before the response
+            with write_transaction():
+                inquiry = serializer.save()
             
             # Send email using the service
             email_sent = EmailService.send_inquiry_email(inquiry)
@@ -0,0 +1,101 @@
+"""
+Non-blocking logging for request threads.
+
+QueueListenerHandler is the only handler request threads call: it puts the
+record on a bounded in-memory queue and returns. A single QueueListener
+thread per process drains the queue into the real handlers (a JSON lines
+file and the console), so disk and terminal I/O never happen on a request
+thread.
+
+Every process appends to the same file through a WatchedFileHandler and
+rotation is left to logrotate: the handler notices the file was renamed
+and reopens it on its next write. Rotating from inside the app would have
+each worker process rename the shared file on its own schedule and keep
+writing into the renamed copies.
+"""
+
+import copy
+from datetime import datetime, timezone
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text
+        if record.stack_info:
+            entry['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class QueueListenerHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that owns its QueueListener and the handlers it writes to.
+    Records are dropped (and counted) rather than blocking when the queue is full.
+    """
+
+    def __init__(self, filename, console=True, console_format='{levelname} {asctime} {module} {message}',
+                 queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        file_handler = logging.handlers.WatchedFileHandler(filename, encoding='utf-8', delay=True)
+        file_handler.setFormatter(JsonFormatter())
+        self.targets = [file_handler]
+        if console:
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(logging.Formatter(console_format, style='{'))
+            self.targets.append(console_handler)
+        self.dropped = 0
+        self.listener = None
+        self._start_listener()
+
+    def _start_listener(self):
+        self._pid = os.getpid()
+        self.listener = logging.handlers.QueueListener(self.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Render the message and traceback now so the record holds no
+        # references to request objects while it waits in the queue
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            # Forked worker: the listener thread did not survive the fork
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+        for handler in self.targets:
+            handler.close()
+        super().close()
@@ -26,7 +26,9 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = os.getenv('DEBUG')
+# DEBUG also selects the profile: development-only apps, middleware and
+# renderers below are only loaded when DEBUG=True.
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS').split(',')
 
@@ -43,8 +45,6 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'api',
-    'debug_toolbar',
-    
 ]
 
 MIDDLEWARE = [
@@ -52,14 +52,17 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'api.middleware.WriteLoadSheddingMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
-
 ]
 
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -88,6 +91,16 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Reuse connections across requests in production
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', 0 if DEBUG else 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # WAL lets catalog reads proceed while a submission is being written;
+            # synchronous=FULL syncs the WAL on every commit, so a submission is
+            # acknowledged only once it survives a power loss
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=FULL;',
+            'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),  # seconds
+        },
     }
 }
 
@@ -133,6 +146,18 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are streamed to disk while hashed and stored once per content hash
+# (see api/storage.py); unreferenced files are removed by gc_media
+STORAGES = {
+    'default': {
+        'BACKEND': 'api.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+FILE_UPLOAD_HANDLERS = ['api.storage.HashingUploadHandler']
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -159,6 +184,93 @@ INTERNAL_IPS = [
 DEFAULT_PAGE_SIZE = 20
 MAX_PAGE_SIZE = 100
 
+# Cache Configuration
+# Product responses are cached per page/product; a shared Redis cache lets
+# every worker (and the warm_cache command) use the same entries.
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+PRODUCT_CACHE_TIMEOUT = int(os.getenv('PRODUCT_CACHE_TIMEOUT', 60 * 15))  # 15 minutes
+
+# Post-deploy prewarm: each starting web worker runs warm_cache --startup in
+# the background (see core/wsgi.py)
+WARM_CACHE_ON_STARTUP = os.getenv('WARM_CACHE_ON_STARTUP', 'False') == 'True'
+WARM_CACHE_STARTUP_LOCK_TIMEOUT = 60 * 5  # a shared cache is warmed at most once in this many seconds
+
+# Idempotency for form submissions (seconds)
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24  # responses stored per Idempotency-Key
+IDEMPOTENCY_DEDUPE_WINDOW = 60  # identical bodies without a key are deduplicated
+IDEMPOTENCY_LOCK_TIMEOUT = 30
+
+# Rate limits for the form endpoints live in the default cache. They are only
+# shared between workers with REDIS_URL set; with the process-local fallback each
+# worker enforces its own limits (check api.W001 warns about it).
+# Clients are identified by REMOTE_ADDR, or by X-Forwarded-For when behind
+# NUM_PROXIES trusted reverse proxies; with 0 the header is ignored, so it
+# can't be spoofed to get a fresh bucket.
+# The browsable API renderer is development-only
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
+    'DEFAULT_THROTTLE_RATES': {
+        'submissions': os.getenv('SUBMISSION_RATE', '10/min'),  # per client IP
+        'submissions_global': os.getenv('SUBMISSION_GLOBAL_RATE', '300/min'),
+    },
+}
+
+# Load shedding for write requests (see api.middleware.WriteLoadSheddingMiddleware)
+WRITE_SHED_PATHS = ['/api/contact-us/', '/api/inquiry/']
+WRITE_CONCURRENCY_LIMIT = int(os.getenv('WRITE_CONCURRENCY_LIMIT', 4))  # per worker process
+WRITE_SHED_RETRY_AFTER = 5  # seconds
+
+# Read submissions older than this are moved to the archive tables by archive_submissions
+SUBMISSION_ARCHIVE_AFTER_DAYS = int(os.getenv('SUBMISSION_ARCHIVE_AFTER_DAYS', 180))
+
+# Seconds a process trusts its in-memory lookup tables before checking their
+# version in the database (see api/services/reference_data.py)
+REFERENCE_DATA_CHECK_INTERVAL = 5
+
+# Number of neighbours kept per product by build_related_products
+RELATED_PRODUCTS_TOP_K = 12
+
+# Static catalog snapshots written by publish_catalog (see api/services/catalog_publisher.py)
+# Serve CATALOG_PUBLISH_ROOT at CATALOG_PUBLISH_URL from nginx or a CDN in production
+CATALOG_PUBLISH_ROOT = os.getenv('CATALOG_PUBLISH_ROOT', BASE_DIR / 'public' / 'catalog')
+CATALOG_PUBLISH_URL = '/catalog/'
+CATALOG_PAGE_SIZE = DEFAULT_PAGE_SIZE
+CATALOG_PUBLISH_BATCH_SIZE = 200  # products rendered per query batch
+CATALOG_PRUNE_AFTER = 60 * 60  # seconds an unreferenced shard is kept for clients holding an old manifest
+CATALOG_PUBLISH_LOCK_TIMEOUT = 60 * 10
+CATALOG_PUBLISH_RETRY_DELAY = 5
+# Republish in the background after product changes
+CATALOG_AUTOPUBLISH = os.getenv('CATALOG_AUTOPUBLISH', 'False') == 'True'
+
+# In-memory catalog index answering product list requests (see api/services/catalog_index.py)
+CATALOG_INDEX_ENABLED = os.getenv('CATALOG_INDEX_ENABLED', 'True') == 'True'
+CATALOG_INDEX_CHECK_INTERVAL = 2  # seconds between checks for changes made by other processes
+CATALOG_INDEX_RESPONSE_CACHE_SIZE = 256  # rendered list pages kept in memory per process
+
+# Product change feed (/api/products/changes/)
+PRODUCT_CHANGES_PAGE_SIZE = 500  # log entries read per request
+PRODUCT_CHANGES_RETENTION_DAYS = 30  # older entries are compacted to one per product
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
@@ -169,31 +281,26 @@ EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL')
 
 # Logging Configuration
+# Request threads only enqueue records; one listener thread per process
+# appends JSON lines to logs/debug.log and writes the console
+# (see core/log_handlers.py).
+# Rotation is external, since every worker process writes the same file:
+# the file handler is a WatchedFileHandler, which reopens logs/debug.log
+# once logrotate has moved it, e.g.
+#   /srv/app/logs/debug.log { size 10M  rotate 5  compress  delaycompress  missingok }
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
-            'style': '{',
-        },
-    },
     'handlers': {
-        'file': {
+        'queue': {
+            '()': 'core.log_handlers.QueueListenerHandler',
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs/debug.log',
-            'formatter': 'verbose',
-        },
-        'console': {
-            'level': 'INFO',
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
         },
     },
     'loggers': {
         'api': {
-            'handlers': ['file', 'console'],
+            'handlers': ['queue'],
             'level': 'INFO',
             'propagate': True,
         },
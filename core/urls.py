@@ -18,7 +18,6 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from debug_toolbar.toolbar import debug_toolbar_urls
 
 
 urlpatterns = [
@@ -26,5 +25,10 @@ urlpatterns = [
     path('api/', include('api.urls')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
+# Published catalog snapshots; served by the web server in production
+urlpatterns += static(settings.CATALOG_PUBLISH_URL, document_root=settings.CATALOG_PUBLISH_ROOT)
+
 if settings.DEBUG:
+    # Only imported in development, production workers never load the toolbar
+    from debug_toolbar.toolbar import debug_toolbar_urls
     urlpatterns += debug_toolbar_urls()
@@ -14,3 +14,40 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Build the catalog index before the first request instead of during it
+import logging  # noqa: E402
+
+from django.conf import settings  # noqa: E402
+
+if settings.CATALOG_INDEX_ENABLED:
+    from api.services.catalog_index import CatalogIndex  # noqa: E402
+
+    try:
+        CatalogIndex.load()
+    except Exception as e:
+        # e.g. migrations not applied yet; the index loads on first use
+        logging.getLogger('api').warning(f"Catalog index not loaded at startup: {str(e)}")
+
+
+
+# Post-deploy prewarm: fill the product caches off the request path
+if settings.WARM_CACHE_ON_STARTUP:
+    from io import StringIO  # noqa: E402
+    import threading  # noqa: E402
+
+    from django.core.management import call_command  # noqa: E402
+    from django.db import connections  # noqa: E402
+
+    def warm_cache():
+        logger = logging.getLogger('api')
+        output = StringIO()
+        try:
+            call_command('warm_cache', '--startup', stdout=output)
+            logger.info(f"Startup cache warming: {output.getvalue().strip()}")
+        except Exception as e:
+            logger.error(f"Startup cache warming failed: {str(e)}")
+        finally:
+            connections.close_all()
+
+    threading.Thread(target=warm_cache, name='warm-cache', daemon=True).start()